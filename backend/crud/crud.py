@@ -1,32 +1,63 @@
 from schemas import schemas, custom_types
 from bson import ObjectId, json_util
-from typing import Union
+from typing import Union, AsyncGenerator
 import pymongo
 from schemas import schemas, custom_types
 from datetime import datetime
 from fastapi import HTTPException
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from utils.setup import Setup
+from motor.motor_asyncio import (
+    AsyncIOMotorDatabase,
+    AsyncIOMotorGridFSBucket,
+    AsyncIOMotorGridOut,
+)
 
 
 # BASIC CRUD OPERATIONS
 
 
+def stamp_new_documents(documents: list[dict]) -> None:
+    """
+    Every document starts at version 1, see versioned_update.
+    """
+    now = datetime.utcnow()
+    for document in documents:
+        document[Setup.version] = 1
+        document[Setup.updated_at] = now
+
+
+def versioned_update(update_query: dict) -> dict:
+    """
+    Adds to an update the version bump of every modified document, read ETags are derived from it.
+    """
+    return {
+        **update_query,
+        "$inc": {**update_query.get("$inc", {}), Setup.version: 1},
+        "$currentDate": {**update_query.get("$currentDate", {}), Setup.updated_at: True},
+    }
+
+
 async def create_n_documents(
     document_data: Union[dict, list],
     collection: str,
     db: AsyncIOMotorDatabase,
     multi: bool = False,
+    ordered: bool = True,
 ) -> Union[ObjectId, list[ObjectId]]:
-    """Create one or multiple documents in a collection."""
+    """
+    Create one or multiple documents in a collection.
+    With `ordered=False` a failing document doesn't stop the others, the raised
+    BulkWriteError lists the failed indexes.
+    """
+
+    stamp_new_documents(document_data if multi else [document_data])
 
     if multi:
-        result = await db[collection].insert_many(document_data)
+        result = await db[collection].insert_many(document_data, ordered=ordered)
         return result.inserted_ids
     else:
-        try:
-            result = await db[collection].insert_one(document_data)
-        except Exception as e:
-            print(e)
+        # Let duplicate key errors (e.g. the unique email index) reach the route decorator
+        result = await db[collection].insert_one(document_data)
         return result.inserted_id
 
 
@@ -51,22 +82,74 @@ async def read_n_documents(
             raise e
 
 
+async def find_n_documents(
+    collection: str,
+    search_query: dict,
+    db: AsyncIOMotorDatabase,
+    projection: dict = None,
+) -> list:
+    """
+    Read the raw documents matching a search query, without any aggregation.
+    """
+    return await db[collection].find(search_query, projection).to_list(length=None)
+
+
+async def count_n_documents(
+    collection: str,
+    search_query: dict,
+    db: AsyncIOMotorDatabase,
+    limit: int = 0,
+) -> int:
+    """
+    Count the documents matching the search query, stopping at `limit` when given.
+    """
+    return await db[collection].count_documents(search_query, limit=limit)
+
+
+async def estimate_n_documents(collection: str, db: AsyncIOMotorDatabase) -> int:
+    """
+    Count all the documents of a collection from its metadata, without scanning it.
+    """
+    return await db[collection].estimated_document_count()
+
+
+async def stream_n_documents(
+    collection: str,
+    db: AsyncIOMotorDatabase,
+    pipeline: list = None,
+    batch_size: int = 500,
+) -> AsyncGenerator[dict, None]:
+    """
+    Iterate over the documents returned by an aggregation, fetching them in batches.
+    """
+    cursor = db[collection].aggregate(pipeline, batchSize=batch_size)
+    async for document in cursor:
+        yield document
+
+
 async def update_n_documents(
     collection: str,
     search_query: dict,
     update_query: dict,
     db: AsyncIOMotorDatabase,
     multi: bool = False,
+    array_filters: list = None,
 ) -> int:
     """
     Update an existing user in the right collection.
+    Every modified document gets its version bumped, read ETags are derived from it.
     """
+    update_query = versioned_update(update_query)
 
     if multi:
-        return await db[collection].update_many(search_query, update_query)
+        return await db[collection].update_many(
+            search_query, update_query, array_filters=array_filters
+        )
     else:
         try:
-            return await db[collection].update_one(search_query, update_query)
+            return await db[collection].update_one(
+                search_query, update_query, array_filters=array_filters
+            )
         except Exception as e:
             raise e
 
@@ -82,3 +165,68 @@ async def delete_n_documents(
         return await db[collection].delete_many(search_query)
     else:
         return await db[collection].delete_one(search_query)
+
+
+async def bulk_write_documents(
+    collection: str,
+    operations: list,
+    db: AsyncIOMotorDatabase,
+    ordered: bool = False,
+):
+    """
+    Send many write operations to a collection in a single command.
+    """
+    return await db[collection].bulk_write(operations, ordered=ordered)
+
+
+# FILE OPERATIONS
+
+
+async def upload_file(
+    bucket: str,
+    filename: str,
+    data: bytes,
+    db: AsyncIOMotorDatabase,
+    metadata: dict = None,
+) -> ObjectId:
+    """
+    Store a file in a GridFS bucket.
+    """
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name=bucket)
+    return await fs.upload_from_stream(filename, data, metadata=metadata)
+
+
+async def open_file(
+    bucket: str, file_id: ObjectId, db: AsyncIOMotorDatabase
+) -> AsyncIOMotorGridOut:
+    """
+    Open a GridFS file for reading, raises gridfs.errors.NoFile if it doesn't exist.
+    """
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name=bucket)
+    return await fs.open_download_stream(file_id)
+
+
+async def find_file(
+    bucket: str, search_query: dict, db: AsyncIOMotorDatabase
+) -> AsyncIOMotorGridOut | None:
+    """
+    Open the first GridFS file matching the search query for reading.
+    """
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name=bucket)
+    async for grid_out in fs.find(search_query, limit=1):
+        return grid_out
+    return None
+
+
+async def delete_files(
+    bucket: str, search_query: dict, db: AsyncIOMotorDatabase
+) -> int:
+    """
+    Delete all the GridFS files whose metadata match the search query.
+    """
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name=bucket)
+    deleted = 0
+    async for grid_out in fs.find(search_query):
+        await fs.delete(grid_out._id)
+        deleted += 1
+    return deleted
@@ -14,7 +14,13 @@ def transform_data_types_for_mongodb(
     mongo_db_query = {}
 
     for x, y in query.items():
-        if isinstance(y, list) and isSearching and not strict_mode:
+        if x == f"{Setup.id}" and isinstance(y, list):
+            mongo_db_query["_id"] = {"$in": convert_id_to_object_id(y)}
+
+        elif schemas.is_range_query(y) and isSearching:
+            mongo_db_query[x] = compile_range(y)
+
+        elif isinstance(y, list) and isSearching and not strict_mode:
             mongo_db_query[x] = {"$in": [z for z in y]}
 
         elif isinstance(y, datetime) and isSearching:
@@ -43,6 +49,32 @@ def transform_data_types_for_mongodb(
     return mongo_db_query
 
 
+def compile_range(value: dict) -> dict:
+    """
+    Turns a validated range into a single predicate on the field, so it can be answered with an index scan.
+    Dates without a time are whole days: {"$lte": day} includes the day, {"$gt": day} starts the day after.
+    """
+    predicate = {}
+    for operator, bound in value.items():
+        if isinstance(bound, date) and not isinstance(bound, datetime):
+            day = datetime(bound.year, bound.month, bound.day)
+            operator, bound = {
+                "$gt": ("$gte", day + timedelta(days=1)),
+                "$gte": ("$gte", day),
+                "$lt": ("$lt", day),
+                "$lte": ("$lt", day + timedelta(days=1)),
+            }[operator]
+
+        # Of two bounds on the same side keep the strictest one
+        if operator in predicate:
+            lower = operator in ("$gt", "$gte")
+            strictest = max if lower else min
+            bound = strictest(bound, predicate[operator])
+        predicate[operator] = bound
+
+    return predicate
+
+
 def convert_id_to_object_id(value) -> ObjectId | list[ObjectId]:
     # If there are fields that end with _id,
     # it means these refer to other collection documents,
@@ -123,7 +155,13 @@ def generate_set_stages(key_to_schema_map: str, pattern: str):
                             "as": "item",
                             "in": {
                                 "$mergeObjects": [
-                                    {"id": {"$toString": "$$item._id"}},
+                                    {
+                                        "id": {"$toString": "$$item._id"},
+                                        # Joined versions are part of the read ETag
+                                        Setup.version: {
+                                            "$ifNull": [f"$$item.{Setup.version}", 0]
+                                        },
+                                    },
                                     {
                                         k: {
                                             "$cond": {
@@ -158,31 +196,96 @@ def generate_set_stages(key_to_schema_map: str, pattern: str):
         raise e
 
 
-def get_lookup_query(key_to_schema_map: str) -> list | None:
+def build_lookup_stages(key_to_schema_map: str) -> dict[str, tuple[dict, dict]]:
     """
-    Generates a complete lookup query for an aggregation pipeline.
+    Generates the lookup and set stages of every reference field of a schema.
     """
     pattern = r".*[^_]_id$"
+    reference_fields = [
+        field
+        for field in schemas.complete_schema_mapping[key_to_schema_map].__fields__
+        if re.match(pattern, field)
+    ]
     lookup_stages = generate_lookup_stages(key_to_schema_map, pattern)
-    if len(lookup_stages) == 0:
-        return None
-
     set_stages = generate_set_stages(key_to_schema_map, pattern)
 
-    # Remove original id fields
-    unset_stages = [
-        {
-            "$unset": [
-                field
-                for field in schemas.complete_schema_mapping[
-                    key_to_schema_map
-                ].__fields__
-                if re.match(pattern, field)
-            ]
-        }
-    ]
+    return dict(zip(reference_fields, zip(lookup_stages, set_stages)))
+
+
+class PipelineTemplates:
+    """
+    Lookup stages of the read pipeline, built once per schema.
+    The stages only depend on the schema, so they are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._lookup_stages: dict[str, dict[str, tuple[dict, dict]]] = {}
+
+    def build(self, schema_mapping: dict = schemas.complete_schema_mapping) -> None:
+        for key_to_schema_map in schema_mapping:
+            self._lookup_stages[key_to_schema_map] = build_lookup_stages(
+                key_to_schema_map
+            )
+
+    def _get_stages(self, key_to_schema_map: str) -> dict[str, tuple[dict, dict]]:
+        if key_to_schema_map not in self._lookup_stages:
+            self._lookup_stages[key_to_schema_map] = build_lookup_stages(
+                key_to_schema_map
+            )
+        return self._lookup_stages[key_to_schema_map]
+
+    def get_reference_fields(self, key_to_schema_map: str) -> list[str]:
+        """
+        The *_id fields of a schema, referencing documents of other collections.
+        """
+        return list(self._get_stages(key_to_schema_map))
+
+    def get_snapshot_query(
+        self, key_to_schema_map: str, fields: list[str] | None = None
+    ) -> list | None:
+        """
+        With denormalized details the *_details snapshots are already stored, only the ids are removed.
+        """
+        selected = [
+            field
+            for field in self._get_stages(key_to_schema_map)
+            if fields is None or field in fields
+        ]
+        if len(selected) == 0:
+            return None
+
+        return [{"$unset": selected}]
 
-    return lookup_stages + unset_stages + set_stages
+    def get_lookup_query(
+        self, key_to_schema_map: str, fields: list[str] | None = None
+    ) -> list | None:
+        stages = self._get_stages(key_to_schema_map)
+
+        # Only join the reference fields that are going to be returned
+        selected = [field for field in stages if fields is None or field in fields]
+        if len(selected) == 0:
+            return None
+
+        lookup_stages = [stages[field][0] for field in selected]
+        # Remove original id fields
+        unset_stages = [{"$unset": selected}]
+        set_stages = [stages[field][1] for field in selected]
+
+        return lookup_stages + unset_stages + set_stages
+
+
+pipeline_templates = PipelineTemplates()
+
+
+def get_lookup_query(
+    key_to_schema_map: str, fields: list[str] | None = None
+) -> list | None:
+    """
+    Generates a complete lookup query for an aggregation pipeline from the prebuilt stages of a schema.
+    """
+    if Setup.denormalized_details:
+        return pipeline_templates.get_snapshot_query(key_to_schema_map, fields)
+    return pipeline_templates.get_lookup_query(key_to_schema_map, fields)
 
 
 def get_read_query_for_mongo(
@@ -191,6 +294,10 @@ def get_read_query_for_mongo(
     is_user_query: bool = True,
     strict_mode: bool = False,
     key_to_schema_map: str = "",
+    limit: int | None = None,
+    after: dict | None = None,
+    fields: list[str] | None = None,
+    sort: list[tuple[str, int]] | None = None,
 ):
     search_query = transform_data_types_for_mongodb(
         query=search_query,
@@ -198,15 +305,46 @@ def get_read_query_for_mongo(
         strict_mode=strict_mode,
     )
 
+    if after:
+        search_query = add_after_filter(
+            search_query, after["after"], sort=sort, values=after["values"]
+        )
+
     set_query = convert_id_to_str(key_to_schema_map=key_to_schema_map, just_id=True)
-    lookup_query = get_lookup_query(key_to_schema_map)
+    lookup_query = get_lookup_query(key_to_schema_map, fields)
 
     projections = {"_id": 0}
-    if not sensitive_data and is_user_query:
-        projections.update({"password": 0, "phone": 0})
+    if fields:
+        # The id and version are always returned, pagination cursors and ETags are built from them
+        projections.update(
+            {
+                f"{Setup.id}": 1,
+                Setup.version: 1,
+                **{field: 1 for field in fields},
+                # Sort values go in the pagination cursor
+                **{field: 1 for field, _ in sort or [] if field != "_id"},
+                # Denormalized snapshots of the requested reference fields
+                **{
+                    f"{field[:-3]}_details": 1
+                    for field in fields
+                    if field in pipeline_templates.get_reference_fields(key_to_schema_map)
+                },
+            }
+        )
+    else:
+        projections[Setup.updated_at] = 0
+        if not sensitive_data and is_user_query:
+            projections.update({"password": 0, "phone": 0})
 
-    pipeline = [
-        {"$match": search_query},
+    pipeline = [{"$match": search_query}]
+
+    # Sort and paginate before any lookup, so only the returned page gets joined
+    if sort or limit or after:
+        pipeline.append({"$sort": get_sort_spec(sort)})
+    if limit:
+        pipeline.append({"$limit": limit})
+
+    pipeline += [
         {"$set": set_query},
         {"$project": projections},
     ]
@@ -217,6 +355,135 @@ def get_read_query_for_mongo(
     return pipeline
 
 
+def get_export_query_for_mongo(
+    search_query: dict = {},
+    is_user_query: bool = True,
+    key_to_schema_map: str = "",
+    fields: list[str] | None = None,
+) -> list:
+    """
+    Like get_read_query_for_mongo but without lookups: exports only carry the stored fields,
+    sorted by _id so the output order is stable.
+    """
+    search_query = transform_data_types_for_mongodb(query=search_query, isSearching=True)
+    set_query = convert_id_to_str(key_to_schema_map=key_to_schema_map, just_id=True)
+
+    if fields:
+        projections = {"_id": 0, f"{Setup.id}": 1, **{field: 1 for field in fields}}
+    else:
+        projections = {
+            "_id": 0,
+            Setup.version: 0,
+            Setup.updated_at: 0,
+            **{
+                f"{field[:-3]}_details": 0
+                for field in pipeline_templates.get_reference_fields(key_to_schema_map)
+            },
+        }
+        if is_user_query:
+            projections.update({"password": 0, "phone": 0})
+
+    return [
+        {"$match": search_query},
+        {"$sort": {"_id": 1}},
+        {"$set": set_query},
+        {"$project": projections},
+    ]
+
+
+def get_score_analytics_query(
+    scope: str,
+    ref_ids: list[str] | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list:
+    """
+    Adds up the daily score rollups of every student or teacher over a range of days.
+    """
+    match = {"scope": scope}
+    if ref_ids is not None:
+        match["ref_id"] = {"$in": ref_ids}
+    days = {}
+    if date_from:
+        days["$gte"] = datetime(date_from.year, date_from.month, date_from.day)
+    if date_to:
+        days["$lte"] = datetime(date_to.year, date_to.month, date_to.day)
+    if days:
+        match["day"] = days
+
+    totals = {
+        "count": {"$sum": "$count"},
+        **{
+            f"{score}_sum": {"$sum": f"${score}_sum"}
+            for score in ("classes", "breaks")
+        },
+        **{
+            f"{score}_{value}": {"$sum": f"${score}_dist.{value}"}
+            for score in ("classes", "breaks")
+            for value in Setup.score_values
+        },
+    }
+    return [{"$match": match}, {"$group": {"_id": "$ref_id", **totals}}]
+
+
+def get_attendance_summary_query(
+    classes_id: str,
+    period: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> dict:
+    """
+    Daily or monthly attendance summaries of a class, a single range on the summaries index.
+    """
+    search_query = {"classes_id": classes_id, "period": period}
+    dates = {}
+    if date_from:
+        dates["$gte"] = datetime(
+            date_from.year, date_from.month, date_from.day if period == "day" else 1
+        )
+    if date_to:
+        dates["$lte"] = datetime(
+            date_to.year, date_to.month, date_to.day if period == "day" else 1
+        )
+    if dates:
+        search_query["date"] = dates
+    return search_query
+
+
+def get_sort_spec(sort: list[tuple[str, int]] | None = None) -> dict:
+    """
+    The $sort of a read, _id always comes last so the order is total and pages never overlap.
+    """
+    spec = dict(sort or [])
+    spec.setdefault("_id", 1)
+    return spec
+
+
+def add_after_filter(
+    search_query: dict,
+    after: ObjectId,
+    sort: list[tuple[str, int]] | None = None,
+    values: list | None = None,
+) -> dict:
+    """
+    Restricts a search query to the documents that come after the given _id and sort values,
+    comparing the sort keys in order (keyset pagination).
+    """
+    spec = get_sort_spec(sort)
+    last = {**dict(zip([x for x in spec if x != "_id"], values or [])), "_id": after}
+
+    branches = []
+    for index, (field, direction) in enumerate(spec.items()):
+        branch = {x: last[x] for x in list(spec)[:index]}
+        branch[field] = {"$gt" if direction == 1 else "$lt": last[field]}
+        branches.append(branch)
+
+    after_query = branches[0] if len(branches) == 1 else {"$or": branches}
+    if set(after_query) & set(search_query):
+        return {"$and": [search_query, after_query]}
+    return {**search_query, **after_query}
+
+
 def get_update_query_for_mongo(
     search_query: dict = {},
     update_data: dict = {},
@@ -229,6 +496,19 @@ def get_update_query_for_mongo(
     return search_query, update_query
 
 
+def add_changed_filter(search_query: dict, update_query: dict) -> dict:
+    """
+    Restricts an update to the documents where at least one field actually changes,
+    so no-op updates don't bump the document version.
+    """
+    set_fields = update_query.get("$set", {})
+    if not set_fields:
+        return search_query
+
+    changed_query = {"$or": [{k: {"$ne": v}} for k, v in set_fields.items()]}
+    return {"$and": [search_query, changed_query]}
+
+
 def get_delete_query_for_mongo(
     search_query: dict = {},
 ):
@@ -260,7 +540,7 @@ def convert_id_to_str(
     return project
 
 
-def get_update_profile_pic_query(user_id: str, binary_image: bytes):
+def get_update_profile_pic_query(user_id: str, profile_pic_url: str):
     search_query = {"_id": ObjectId(user_id)}
-    update_query = {"$set": {"profile_pic": binary_image}}
+    update_query = {"$set": {"profile_pic": profile_pic_url}}
     return search_query, update_query
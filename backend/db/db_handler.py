@@ -1,23 +1,60 @@
 import motor.motor_asyncio
 from decouple import config
 from fastapi import Request
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from typing import Generator, AsyncGenerator
 
 
-async def get_db(request: Request = None) -> AsyncGenerator[AsyncIOMotorDatabase, None]:
+class MongoClientRegistry:
+    """
+    Keeps one pooled Motor client per Mongo URI for the whole process.
+    Clients are created lazily on first use and closed together on shutdown.
+    """
+
+    def __init__(
+        self,
+        max_pool_size: int = config("MONGO_MAX_POOL_SIZE", default=100, cast=int),
+        min_pool_size: int = config("MONGO_MIN_POOL_SIZE", default=0, cast=int),
+        max_idle_time_ms: int = config(
+            "MONGO_MAX_IDLE_TIME_MS", default=60_000, cast=int
+        ),
+        wait_queue_timeout_ms: int = config(
+            "MONGO_WAIT_QUEUE_TIMEOUT_MS", default=5_000, cast=int
+        ),
+    ):
+        self.pool_options = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min_pool_size,
+            "maxIdleTimeMS": max_idle_time_ms,
+            "waitQueueTimeoutMS": wait_queue_timeout_ms,
+        }
+        self._clients: dict[str, AsyncIOMotorClient] = {}
+
+    def get_client(self, mongo_url: str) -> AsyncIOMotorClient:
+        client = self._clients.get(mongo_url)
+        if client is None:
+            client = motor.motor_asyncio.AsyncIOMotorClient(
+                mongo_url, **self.pool_options
+            )
+            self._clients[mongo_url] = client
+        return client
+
+    def close(self) -> None:
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+
+
+def get_db_settings(request: Request = None, test: bool = False) -> tuple[str, str]:
     # Determines which database to use based on request
-    if request and request.headers.get("X-Test-Env"):
-        db_name = config("TEST_DB_NAME")
-        mongo_url = config("MONGO_DB_TEST_URI")
-    else:
-        db_name = config("PROD_DB_NAME")
-        mongo_url = config("MONGO_DB_PROD_URI")
-
-    # Connessione al database
-    client = motor.motor_asyncio.AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
-    try:
-        yield db
-    finally:
-        client.close()
+    if test or (request and request.headers.get("X-Test-Env")):
+        return config("TEST_DB_NAME"), config("MONGO_DB_TEST_URI")
+    return config("PROD_DB_NAME"), config("MONGO_DB_PROD_URI")
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncIOMotorDatabase, None]:
+    db_name, mongo_url = get_db_settings(request)
+
+    # The registry is created by the app lifespan, see main.create_app
+    registry: MongoClientRegistry = request.app.state.mongo_clients
+    yield registry.get_client(mongo_url)[db_name]
@@ -0,0 +1,130 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo import errors as pymongo_errors
+from schemas.indexes import index_declarations
+from db.db_handler import MongoClientRegistry, get_db_settings
+import argparse
+import asyncio
+
+
+# Options that make two indexes with the same keys behave differently
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression")
+
+
+def normalize_index(index: dict) -> dict:
+    return {
+        "key": [(field, direction) for field, direction in index["key"].items()]
+        if isinstance(index["key"], dict)
+        else [tuple(x) for x in index["key"]],
+        **{option: index[option] for option in COMPARED_OPTIONS if option in index},
+    }
+
+
+class IndexManager:
+    """
+    Creates the indexes declared in schemas/indexes.py and reports how the live ones differ.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        declarations: dict[str, list[IndexModel]] = index_declarations,
+    ):
+        self.db = db
+        self.declarations = declarations
+
+    async def collection_drift(
+        self, collection_name: str, indexes: list[IndexModel]
+    ) -> dict[str, list[str]]:
+        live = await self.db[collection_name].index_information()
+        live.pop("_id_", None)
+
+        missing, changed = [], []
+        for index in indexes:
+            name = index.document["name"]
+            if name not in live:
+                missing.append(name)
+            elif normalize_index(live[name]) != normalize_index(index.document):
+                changed.append(name)
+
+        declared_names = {index.document["name"] for index in indexes}
+        extra = [name for name in live if name not in declared_names]
+
+        return {"missing": missing, "changed": changed, "extra": extra}
+
+    async def drift(self) -> dict[str, dict[str, list[str]]]:
+        """
+        Returns, for each collection, the declared indexes that are missing or differ from the live ones
+        and the live indexes that are not declared.
+        """
+        report = {}
+        for collection, indexes in self.declarations.items():
+            collection_name = getattr(collection, "value", collection)
+            drift = await self.collection_drift(collection_name, indexes)
+            if any(drift.values()):
+                report[collection_name] = drift
+
+        return report
+
+    async def apply(self) -> dict[str, list[str]]:
+        """
+        Creates the declared indexes that don't exist yet, returns their names per collection.
+        """
+        created = {}
+        for collection, indexes in self.declarations.items():
+            collection_name = getattr(collection, "value", collection)
+            drift = await self.collection_drift(collection_name, indexes)
+            missing = [
+                index for index in indexes if index.document["name"] in drift["missing"]
+            ]
+            if missing:
+                created[collection_name] = await self.db[
+                    collection_name
+                ].create_indexes(missing)
+
+        return created
+
+
+async def apply_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Creates the missing indexes at startup, a failure is reported but doesn't prevent the app from starting.
+    """
+    try:
+        manager = IndexManager(db)
+        created = await manager.apply()
+        drift = await manager.drift()
+    except pymongo_errors.PyMongoError as e:
+        print(f"⚠️ Index creation failed: {e}", flush=True)
+        return
+
+    if created:
+        print(f"Created indexes: {created}", flush=True)
+    if drift:
+        print(f"⚠️ Live indexes differ from the declared ones: {drift}", flush=True)
+
+
+async def main(test: bool = False, check: bool = False) -> dict:
+    db_name, mongo_url = get_db_settings(test=test)
+
+    registry = MongoClientRegistry()
+    try:
+        manager = IndexManager(registry.get_client(mongo_url)[db_name])
+        if check:
+            return await manager.drift()
+        return await manager.apply()
+    finally:
+        registry.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create the declared MongoDB indexes or report their drift."
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="only report the drift, don't create"
+    )
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    args = parser.parse_args()
+
+    result = asyncio.run(main(test=args.test, check=args.check))
+    print(result if result else "Indexes are up to date.")
@@ -1,17 +1,44 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from db.db_handler import MongoClientRegistry, get_db_settings
+from db.index_manager import apply_indexes
+from services import encryption, images
+from crud import queries
 from routers.users import users
 from routers.classes import classes
 from routers.scores import scores
 from routers.admins import admins
 from routers.attendances import attendances
+from routers.batch import batch
+from routers.bulk import bulk
+from utils.responses import FastJSONResponse
 
 from fastapi.middleware.cors import CORSMiddleware
 
 import debugpy
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Mongo client per URI for the whole process
+    app.state.mongo_clients = MongoClientRegistry()
+    # Aggregation stages only depend on the schemas, build them once
+    queries.pipeline_templates.build()
+    # Create the indexes declared in schemas/indexes.py that are missing,
+    # the test database gets them from the test setup (python -m db.index_manager --test)
+    db_name, mongo_url = get_db_settings()
+    await apply_indexes(app.state.mongo_clients.get_client(mongo_url)[db_name])
+    try:
+        yield
+    finally:
+        app.state.mongo_clients.close()
+        encryption.password_hasher.shutdown()
+        images.image_processor.shutdown()
+
+
 def create_app():
-    app = FastAPI()
+    # Responses are rendered by orjson, routers use FastJSONRoute to skip jsonable_encoder
+    app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
     origins = [
         "http://localhost:3000",  # React's default dev server
@@ -35,6 +62,8 @@ def create_app():
     app.include_router(classes)
     app.include_router(scores)
     app.include_router(attendances)
+    app.include_router(batch)
+    app.include_router(bulk)
 
     return app
 
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import BackgroundTasks, File, UploadFile
+from fastapi.responses import StreamingResponse
 from typing import Optional, Union
 from schemas import schemas, custom_types
 from crud import crud, queries
@@ -9,12 +11,13 @@ from pymongo import errors as pymongo_errors
 from utils.setup import Setup
 import json
 from utils.decorators import handle_mongodb_exceptions
+from utils.responses import FastJSONRoute
 from routers.users import read_token_from_header_factory
 from pydantic import BaseModel
-from services import data_service
+from services import data_service, images, imports
 
 
-admins = APIRouter(prefix="/admins", tags=["Admins"])
+admins = APIRouter(prefix="/admins", tags=["Admins"], route_class=FastJSONRoute)
 
 
 @admins.patch("/{user_id}")
@@ -65,6 +68,106 @@ async def delete_other_user(
     if user_role == schemas.User.ADMIN:
         raise HTTPException(status_code=422, detail="Admins can't delete other admins")
     search_query = {f"{Setup.id}": user_id}
-    return await data_service.delete_service(
+    response = await data_service.delete_service(
         search_query=search_query, key_to_schema_map=user_role, db=db, multi=multi
     )
+    await data_service.delete_profile_pics_service(user_id=user_id, db=db)
+
+    return response
+
+
+@admins.post("/import", status_code=202)
+@handle_mongodb_exceptions
+async def import_users(
+    user_role: schemas.User,
+    background_tasks: BackgroundTasks,
+    file_format: imports.ImportFormat = "csv",
+    file: UploadFile = File(...),
+    db: Database = Depends(get_db),
+    _: dict = Depends(
+        read_token_from_header_factory(
+            roles=[
+                schemas.User.ADMIN,
+            ]
+        )
+    ),
+) -> dict:
+    """
+    Create many users of a role from a CSV (with a header row) or NDJSON file.
+    Rows are inserted in the background, poll GET /admins/import/{import_id} for the progress and the errors of every row.
+    """
+    if user_role == schemas.User.ADMIN:
+        raise HTTPException(status_code=422, detail="Admins can't import other admins")
+
+    contents = await images.read_upload(file, max_size=imports.IMPORT_MAX_BYTES)
+    rows = imports.parse_rows(contents, file_format, user_role)
+    if not rows:
+        raise HTTPException(status_code=422, detail="The file has no rows")
+
+    job = imports.import_jobs.create(user_role, total=len(rows))
+    background_tasks.add_task(imports.run_import, job, rows, db)
+
+    return job.report()
+
+
+@admins.get("/import/{import_id}")
+async def read_import(
+    import_id: str,
+    _: dict = Depends(
+        read_token_from_header_factory(
+            roles=[
+                schemas.User.ADMIN,
+            ]
+        )
+    ),
+) -> dict:
+    """Progress and per row errors of an import."""
+    return imports.import_jobs.get(import_id).report()
+
+
+@admins.get("/export/{collection}")
+@handle_mongodb_exceptions
+async def export_collection(
+    collection: str,
+    query: Optional[str] = None,
+    file_format: imports.ImportFormat = "ndjson",
+    fields: Optional[str] = None,
+    gzip: bool = False,
+    db: Database = Depends(get_db),
+    _: dict = Depends(
+        read_token_from_header_factory(
+            roles=[
+                schemas.User.ADMIN,
+            ]
+        )
+    ),
+):
+    """
+    Download a whole collection, or the part matching the query, as CSV or NDJSON.
+    Passwords and phones are never exported, with gzip=true the file is compressed on the fly.
+    """
+    key_to_schema_map = next(
+        (x for x in schemas.complete_schema_mapping if x.value == collection), None
+    )
+    if key_to_schema_map is None:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Valid collections are {[x.value for x in schemas.complete_schema_mapping]}",
+        )
+
+    lines = await data_service.export_service(
+        search_query=query or {},
+        key_to_schema_map=key_to_schema_map,
+        db=db,
+        file_format=file_format,
+        fields=fields,
+        compress=gzip,
+    )
+
+    filename = f"{collection}.{file_format}" + (".gz" if gzip else "")
+    media_type = {"csv": "text/csv", "ndjson": "application/x-ndjson"}[file_format]
+    return StreamingResponse(
+        lines,
+        media_type="application/gzip" if gzip else media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
-from typing import Optional, Union
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, Union, Literal
+from datetime import datetime
 from schemas import schemas, custom_types
 from crud import crud, queries
 from pymongo.database import Database
@@ -9,12 +11,16 @@ from pymongo import errors as pymongo_errors
 from utils.setup import Setup
 import json
 from utils.decorators import handle_mongodb_exceptions
+from utils.responses import FastJSONRoute
+from utils.caching import etag_response
 from routers.users import read_token_from_header_factory
 from pydantic import BaseModel
 from services import data_service
 
 
-attendances = APIRouter(prefix="/attendances", tags=["Attendances"])
+attendances = APIRouter(
+    prefix="/attendances", tags=["Attendances"], route_class=FastJSONRoute
+)
 
 
 @attendances.post("/")
@@ -41,32 +47,89 @@ async def create_n_attendances(
     return {"id": attendances_ids}
 
 
+@attendances.get("/summary")
+@handle_mongodb_exceptions
+async def read_attendances_summary(
+    classes_id: str,
+    period: Literal["day", "month"] = "day",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Database = Depends(get_db),
+    _: str = Depends(read_token_from_header_factory()),
+):
+    """
+    Registers, present students and teachers of a class per day or per month, in date order.
+    The date range is inclusive, monthly summaries include every month the range touches.
+    """
+    results = await data_service.attendance_summary_service(
+        classes_id=classes_id,
+        period=period,
+        db=db,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return {"results": results, "count": len(results)}
+
+
 @attendances.get("/")
 @handle_mongodb_exceptions
 async def read_n_attendances(
+    request: Request,
     query: str,
     multi: bool = False,
+    limit: Optional[int] = Query(default=None, ge=1),
+    after: Optional[str] = None,
+    stream: bool = False,
+    count_only: bool = False,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
     db: Database = Depends(get_db),
     _: str = Depends(read_token_from_header_factory()),
 ):
     """Read one or multiple class records. Will return any document."""
 
+    if count_only:
+        # Just the number of matching documents, nothing is read or joined
+        count = await data_service.count_service(
+            search_query=query, key_to_schema_map=schemas.Data.ATTENDANCE, db=db
+        )
+        return {"count": count}
+
+    if stream:
+        # Send every matching document as a NDJSON line
+        lines = await data_service.stream_service(
+            search_query=query,
+            key_to_schema_map=schemas.Data.ATTENDANCE,
+            db=db,
+            is_user_query=False,
+            limit=limit,
+            after=after,
+            fields=fields,
+            sort=sort,
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
     attendances_data = await data_service.read_service(
         search_query=query,
         key_to_schema_map=schemas.Data.ATTENDANCE,
         db=db,
         multi=multi,
         is_user_query=False,
+        limit=limit,
+        after=after,
+        fields=fields,
+        sort=sort,
     )
 
     # Prepare response
-    response = {
-        "results": attendances_data,
-        "count": len(attendances_data) if isinstance(attendances_data, list) else None,
-    }
+    response = data_service.build_list_response(
+        attendances_data, limit=limit, key_to_schema_map=schemas.Data.ATTENDANCE, sort=sort
+    )
 
-    # Send Response
-    return response
+    # Send Response, or 304 if the client already has it
+    return etag_response(
+        response, response["results"], request, response.get("next")
+    )
 
 
 @attendances.patch("/")
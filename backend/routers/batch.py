@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Depends
+from schemas import schemas
+from pymongo.database import Database
+from db.db_handler import get_db
+from utils.decorators import handle_mongodb_exceptions
+from utils.responses import FastJSONRoute
+from utils.setup import Setup
+from routers.users import read_token_from_header_factory
+from services import data_service
+
+
+batch = APIRouter(prefix="/batch", tags=["Batch"], route_class=FastJSONRoute)
+
+
+@batch.post("/read")
+@handle_mongodb_exceptions
+async def batch_read(
+    items: list[schemas.BatchReadItem],
+    db: Database = Depends(get_db),
+    _: str = Depends(read_token_from_header_factory()),
+):
+    """Read documents of many collections in one call. Each item asks for a list of ids or a query, results are keyed by the item key or position."""
+    if len(items) > Setup.batch_max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A batch can't have more than {Setup.batch_max_items} items",
+        )
+
+    results = await data_service.batch_read_service(items=items, db=db)
+
+    return {"results": results}
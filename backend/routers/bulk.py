@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Depends
+from schemas import schemas
+from pymongo.database import Database
+from db.db_handler import get_db
+from utils.decorators import handle_mongodb_exceptions
+from utils.responses import FastJSONRoute
+from utils.setup import Setup
+from routers.users import read_token_from_header_factory
+from services import data_service
+
+
+bulk = APIRouter(prefix="/bulk", tags=["Bulk"], route_class=FastJSONRoute)
+
+
+@bulk.post("")
+@handle_mongodb_exceptions
+async def bulk_write(
+    operations: list[schemas.BulkOperation],
+    db: Database = Depends(get_db),
+    token_payload: dict = Depends(
+        read_token_from_header_factory(
+            roles=[
+                schemas.User.ADMIN.value,
+                schemas.User.TEACHER.value,
+            ]
+        )
+    ),
+):
+    """Insert, update and delete scores, attendances and classes in one call. Returns the status of every operation, in the same order."""
+    if len(operations) > Setup.bulk_max_operations:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A bulk request can't have more than {Setup.bulk_max_operations} operations",
+        )
+
+    return await data_service.bulk_write_service(
+        operations=operations,
+        db=db,
+        token_payload=token_payload,
+    )
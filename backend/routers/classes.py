@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional, Union
 from schemas import schemas, custom_types
 from crud import crud, queries
@@ -9,12 +10,14 @@ from pymongo import errors as pymongo_errors
 from utils.setup import Setup
 import json
 from utils.decorators import handle_mongodb_exceptions
+from utils.responses import FastJSONRoute
+from utils.caching import etag_response
 from routers.users import read_token_from_header_factory
 from pydantic import BaseModel
 from services import data_service
 
 
-classes = APIRouter(prefix="/classes", tags=["Classes"])
+classes = APIRouter(prefix="/classes", tags=["Classes"], route_class=FastJSONRoute)
 
 
 @classes.post("/")
@@ -50,29 +53,62 @@ async def create_n_classes(
 @classes.get("/")
 @handle_mongodb_exceptions
 async def read_n_classes(
+    request: Request,
     query: str,
     multi: bool = False,
+    limit: Optional[int] = Query(default=None, ge=1),
+    after: Optional[str] = None,
+    stream: bool = False,
+    count_only: bool = False,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
     db: Database = Depends(get_db),
     _: str = Depends(read_token_from_header_factory()),
 ):
     """Read one or multiple class records. Accepts optional parameters name and/or grade, otherwise will return any document."""
 
+    if count_only:
+        # Just the number of matching documents, nothing is read or joined
+        count = await data_service.count_service(
+            search_query=query, key_to_schema_map=schemas.Data.CLASS, db=db
+        )
+        return {"count": count}
+
+    if stream:
+        # Send every matching document as a NDJSON line
+        lines = await data_service.stream_service(
+            search_query=query,
+            key_to_schema_map=schemas.Data.CLASS,
+            db=db,
+            is_user_query=False,
+            limit=limit,
+            after=after,
+            fields=fields,
+            sort=sort,
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
     classes_data = await data_service.read_service(
         search_query=query,
         key_to_schema_map=schemas.Data.CLASS,
         db=db,
         multi=multi,
         is_user_query=False,
+        limit=limit,
+        after=after,
+        fields=fields,
+        sort=sort,
     )
 
     # Prepare response
-    response = {
-        "results": classes_data,
-        "count": len(classes_data) if isinstance(classes_data, list) else None,
-    }
+    response = data_service.build_list_response(
+        classes_data, limit=limit, key_to_schema_map=schemas.Data.CLASS, sort=sort
+    )
 
-    # Send Response
-    return response
+    # Send Response, or 304 if the client already has it
+    return etag_response(
+        response, response["results"], request, response.get("next")
+    )
 
 
 @classes.patch("/")
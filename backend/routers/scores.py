@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
-from typing import Optional, Union
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, Union, Literal
+from datetime import datetime
 from schemas import schemas, custom_types
 from crud import crud, queries
 from pymongo.database import Database
@@ -9,12 +11,14 @@ from pymongo import errors as pymongo_errors
 from utils.setup import Setup
 import json
 from utils.decorators import handle_mongodb_exceptions
+from utils.responses import FastJSONRoute
+from utils.caching import etag_response
 from routers.users import read_token_from_header_factory
 from pydantic import BaseModel
 from services import data_service
 
 
-scores = APIRouter(prefix="/scores", tags=["Scores"])
+scores = APIRouter(prefix="/scores", tags=["Scores"], route_class=FastJSONRoute)
 
 
 @scores.post("/")
@@ -31,8 +35,10 @@ async def create_n_scores(
     ),
 ):
     """Create one or multiple class records. Accepts either a single class object or a list of class objects."""
-    if not scores_data.teacher_id:
-        scores_data.teacher_id = token_payload[f"{Setup.id}"]
+    # Teachers writing scores are their teacher by default
+    for score in scores_data if isinstance(scores_data, list) else [scores_data]:
+        if not score.teachers_id:
+            score.teachers_id = token_payload[f"{Setup.id}"]
 
     scores_ids = await data_service.create_service(
         data=scores_data,
@@ -43,32 +49,97 @@ async def create_n_scores(
     return {"id": scores_ids}
 
 
+@scores.get("/analytics")
+@handle_mongodb_exceptions
+async def read_scores_analytics(
+    scope: Literal["students", "teachers", "classes"],
+    ids: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Database = Depends(get_db),
+    _: str = Depends(
+        read_token_from_header_factory(
+            roles=[
+                schemas.User.ADMIN.value,
+                schemas.User.TEACHER.value,
+            ]
+        )
+    ),
+):
+    """
+    Averages, counts and distributions of classes and breaks scores per student, teacher or class.
+    `ids` is a comma separated list, without it every student, teacher or class with scores is returned.
+    The date range is inclusive and counted in whole days.
+    """
+    results = await data_service.score_analytics_service(
+        scope=scope,
+        db=db,
+        ids=[x.strip() for x in ids.split(",") if x.strip()] if ids else None,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return {"results": results, "count": len(results)}
+
+
 @scores.get("/")
 @handle_mongodb_exceptions
 async def read_n_scores(
+    request: Request,
     query: str,
     multi: bool = False,
+    limit: Optional[int] = Query(default=None, ge=1),
+    after: Optional[str] = None,
+    stream: bool = False,
+    count_only: bool = False,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
     db: Database = Depends(get_db),
     _: str = Depends(read_token_from_header_factory()),
 ):
     """Read one or multiple class records. Accepts optional parameters name and/or grade, otherwise will return any document."""
 
+    if count_only:
+        # Just the number of matching documents, nothing is read or joined
+        count = await data_service.count_service(
+            search_query=query, key_to_schema_map=schemas.Data.SCORE, db=db
+        )
+        return {"count": count}
+
+    if stream:
+        # Send every matching document as a NDJSON line
+        lines = await data_service.stream_service(
+            search_query=query,
+            key_to_schema_map=schemas.Data.SCORE,
+            db=db,
+            is_user_query=False,
+            limit=limit,
+            after=after,
+            fields=fields,
+            sort=sort,
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
     scores_data = await data_service.read_service(
         search_query=query,
         key_to_schema_map=schemas.Data.SCORE,
         db=db,
         multi=multi,
         is_user_query=False,
+        limit=limit,
+        after=after,
+        fields=fields,
+        sort=sort,
     )
 
     # Prepare response
-    response = {
-        "results": scores_data,
-        "count": len(scores_data) if isinstance(scores_data, list) else None,
-    }
+    response = data_service.build_list_response(
+        scores_data, limit=limit, key_to_schema_map=schemas.Data.SCORE, sort=sort
+    )
 
-    # Send Response
-    return response
+    # Send Response, or 304 if the client already has it
+    return etag_response(
+        response, response["results"], request, response.get("next")
+    )
 
 
 @scores.patch("/")
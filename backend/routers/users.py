@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
-from typing import Optional, Union, Annotated
+from fastapi import APIRouter, HTTPException, Depends, Body, Query
+from typing import Optional, Union, Annotated, Literal
 from schemas import schemas, custom_types
 from crud import crud
 from pymongo.database import Database
@@ -9,17 +9,20 @@ from pymongo import errors as pymongo_errors
 from utils.setup import Setup
 from bson import ObjectId
 from utils.decorators import handle_mongodb_exceptions
+from utils.responses import FastJSONRoute
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import TypeAdapter
 import json
 from crud import queries
-from services import data_service
-from fastapi import File, UploadFile, Depends
+from services import data_service, images
+from fastapi import File, UploadFile, Depends, Header, Response, Request
+from fastapi.responses import StreamingResponse
+from utils.caching import etag_matches, etag_response
 from io import BytesIO
 import shutil
 import base64
 
-users = APIRouter(prefix="/users", tags=["Users"])
+users = APIRouter(prefix="/users", tags=["Users"], route_class=FastJSONRoute)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/signin")
 
 
@@ -57,7 +60,7 @@ async def signup(
             detail=f"Check your fields, valid fields are {set(schemas.complete_schema_mapping[user_role.value].__fields__.keys())}",
         )
     # Hash Password
-    hashed_password = encryption.encrypt_password(user_data.password)
+    hashed_password = await encryption.password_hasher.hash(user_data.password)
     user_data.password = hashed_password
 
     user_id = await data_service.create_service(
@@ -89,7 +92,9 @@ async def signin(
     )
 
     # Verify password
-    if not encryption.check_password(credentials.password, user_data["password"]):
+    if not await encryption.password_hasher.verify(
+        credentials.password, user_data["password"]
+    ):
         raise HTTPException(status_code=401, detail="Invalid password")
 
     # Create a JWT
@@ -110,28 +115,56 @@ async def signin(
 @users.get("/search")
 @handle_mongodb_exceptions
 async def read_other_user(
+    request: Request,
     role: schemas.User,
     search_query: str,
+    multi: bool = False,
+    limit: Optional[int] = Query(default=None, ge=1),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
     db: Database = Depends(get_db),
     _: dict = Depends(read_token_from_header_factory()),
 ) -> dict:
-    """Retries a user from database without sensitive information"""
+    """Retries one or multiple users from database without sensitive information"""
 
     # Use the Read Service
-    user_data = data_service.read_service(
+    user_data = await data_service.read_service(
         search_query=search_query,
         key_to_schema_map=role,
         db=db,
+        multi=multi,
+        limit=limit,
+        after=after,
+        fields=fields,
+        sort=sort,
     )
 
-    # Build Response
-    response = schemas.UserFactory.create_user(role, user_data)
-    return response.dict()
+    # Build Response, partial documents are already shaped by the projection
+    if not multi:
+        response = (
+            user_data
+            if fields
+            else schemas.UserFactory.create_trusted_user(role, user_data)
+        )
+        return etag_response(response, user_data, request)
+
+    response = data_service.build_list_response(
+        user_data, limit=limit, key_to_schema_map=role, sort=sort
+    )
+    users_data = response["results"]
+    if not fields:
+        response["results"] = [
+            schemas.UserFactory.create_trusted_user(role, user) for user in users_data
+        ]
+    return etag_response(response, users_data, request, response.get("next"))
 
 
 @users.get("/")
 @handle_mongodb_exceptions
 async def read_user(
+    request: Request,
+    fields: Optional[str] = None,
     db: Database = Depends(get_db),
     token_payload: dict = Depends(read_token_from_header_factory()),
 ) -> dict:
@@ -146,11 +179,16 @@ async def read_user(
         search_query=search_query,
         key_to_schema_map=user_role,
         db=db,
+        fields=fields,
     )
 
-    # Build Response
-    response = schemas.UserFactory.create_user(user_role, user_data)
-    return response.dict()
+    # Build Response, partial documents are already shaped by the projection
+    response = (
+        user_data
+        if fields
+        else schemas.UserFactory.create_trusted_user(user_role, user_data)
+    )
+    return etag_response(response, user_data, request)
 
 
 @users.patch("/change_password")
@@ -172,28 +210,32 @@ async def update_user_password(
     role = token_payload[f"{Setup.role}"]
     user_id = token_payload[f"{Setup.id}"]
 
-    user_data = await crud.get_user_by_email(
-        collection=role,
-        user_id=user_id,
+    user_data = await data_service.read_service(
+        search_query={f"{Setup.id}": user_id},
+        key_to_schema_map=role,
         db=db,
+        isSensitive=True,
     )
 
     if not user_data:
-        HTTPException(status_code=404, detail="User not found on dB.")
-
-    if encryption.check_password(old_password, user_data["password"]):
-        result = await crud.update_n_documents(
-            collection=role,
-            update_data={"password": new_password},
-            search_query={"_id": ObjectId(user_id)},
-            db=db,
-            multi=False,
-        )
+        raise HTTPException(status_code=404, detail="User not found on dB.")
+
+    if not await encryption.password_hasher.verify(old_password, user_data["password"]):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    hashed_password = await encryption.password_hasher.hash(new_password)
+    result = await crud.update_n_documents(
+        collection=role,
+        update_query={"$set": {"password": hashed_password}},
+        search_query={"_id": ObjectId(user_id)},
+        db=db,
+        multi=False,
+    )
 
-        if result.modified_count > 0:
-            return {"message": "Password Changed successfully"}
-        else:
-            raise HTTPException(status_code=410, detail="Password was NOT updated.")
+    if result.modified_count > 0:
+        return {"message": "Password Changed successfully"}
+    else:
+        raise HTTPException(status_code=410, detail="Password was NOT updated.")
 
 
 @users.patch("/")
@@ -242,27 +284,32 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
 
     # Check if the provided password matches the user's password
-    if not encryption.check_password(password, user_data["password"]):
+    if not await encryption.password_hasher.verify(password, user_data["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    return await data_service.delete_service(
+    response = await data_service.delete_service(
         search_query=search_query,
         key_to_schema_map=user_role,
         db=db,
     )
+    await data_service.delete_profile_pics_service(user_id=user_id, db=db)
+
+    return response
 
 
 @users.post("/upload-image/")
+@handle_mongodb_exceptions
 async def create_upload_profile_picture(
     file: UploadFile = File(...),
     db: Database = Depends(get_db),
     token_payload=Depends(read_token_from_header_factory()),
 ):
-    # Read the image file and encode the binary image data to Base64
-    contents = await file.read()
-    base64_encoded_image = (
-        f"data:image/png;base64,{base64.b64encode(contents).decode('utf-8')}"
-    )
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=415, detail="Only images can be uploaded.")
+
+    # Read the image file up to the maximum size and resize it in the worker pool
+    contents = await images.read_upload(file)
+    variants = await images.image_processor.render(contents)
 
     user_id = token_payload[f"{Setup.id}"]
     user_role = token_payload[f"{Setup.role}"]
@@ -271,5 +318,40 @@ async def create_upload_profile_picture(
         user_id=user_id,
         user_role=user_role,
         db=db,
-        base64_image=base64_encoded_image,
+        variants=variants,
+        content_type=images.IMAGE_CONTENT_TYPE,
+    )
+
+
+@users.get("/profile-picture/{picture_id}")
+@handle_mongodb_exceptions
+async def read_profile_picture(
+    picture_id: str,
+    variant: Literal[tuple(images.IMAGE_VARIANTS)] = "card",
+    if_none_match: Optional[str] = Header(default=None),
+    db: Database = Depends(get_db),
+):
+    """Serves a profile picture, public so it can be used as an image source and cached by browsers."""
+    headers = {
+        "ETag": f'"{picture_id}-{variant}"',
+        "Cache-Control": Setup.profile_pic_cache_control,
+    }
+
+    # Pictures never change, a known ETag doesn't need the dB at all
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    grid_out = await data_service.read_profile_pic_service(
+        picture_id=picture_id, variant=variant, db=db
+    )
+    headers["Content-Length"] = str(grid_out.length)
+
+    async def chunks():
+        while chunk := await grid_out.readchunk():
+            yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=(grid_out.metadata or {}).get("content_type"),
+        headers=headers,
     )
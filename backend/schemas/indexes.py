@@ -0,0 +1,76 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from schemas.custom_types import User, Data
+from utils.setup import Setup
+
+
+# Every user collection is searched by email on signin
+user_indexes = [
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+]
+
+index_declarations: dict[str, list[IndexModel]] = {
+    User.ADMIN: [*user_indexes],
+    User.TEACHER: [*user_indexes],
+    User.STUDENT: [
+        *user_indexes,
+        IndexModel([("relatives_id", ASCENDING)], name="relatives_id"),
+        IndexModel([("teachers_id", ASCENDING)], name="teachers_id"),
+    ],
+    User.RELATIVE: [
+        *user_indexes,
+        IndexModel([("students_id", ASCENDING)], name="students_id"),
+    ],
+    Data.CLASS: [
+        IndexModel([("grade", ASCENDING), ("name", ASCENDING)], name="grade_name"),
+        IndexModel([("students_id", ASCENDING)], name="students_id"),
+        IndexModel([("teachers_id", ASCENDING)], name="teachers_id"),
+    ],
+    Data.SCORE: [
+        IndexModel([("date", DESCENDING)], name="date"),
+        IndexModel(
+            [("students_id", ASCENDING), ("date", DESCENDING)],
+            name="students_id_date",
+        ),
+        IndexModel(
+            [("teachers_id", ASCENDING), ("date", DESCENDING)],
+            name="teachers_id_date",
+        ),
+    ],
+    Data.ATTENDANCE: [
+        IndexModel(
+            [("classes_id", ASCENDING), ("date", DESCENDING)],
+            name="classes_id_date",
+        ),
+        IndexModel([("students_id", ASCENDING)], name="students_id"),
+        IndexModel([("teachers_id", ASCENDING)], name="teachers_id"),
+    ],
+    # One rollup per scope, student or teacher, and day, see services.rollups
+    Setup.score_rollups: [
+        IndexModel(
+            [("scope", ASCENDING), ("ref_id", ASCENDING), ("day", ASCENDING)],
+            name="scope_ref_id_day",
+            unique=True,
+        ),
+    ],
+    # One summary per class, period (day or month) and date, see services.rollups
+    Setup.attendance_summaries: [
+        IndexModel(
+            [("classes_id", ASCENDING), ("period", ASCENDING), ("date", ASCENDING)],
+            name="classes_id_period_date",
+            unique=True,
+        ),
+    ],
+    # Profile pictures are looked up by picture and variant, and removed by owner
+    f"{Setup.profile_pic_bucket}.files": [
+        IndexModel(
+            [("metadata.picture_id", ASCENDING), ("metadata.variant", ASCENDING)],
+            name="picture_id_variant",
+        ),
+        IndexModel([("metadata.user_id", ASCENDING)], name="user_id"),
+        # Created by GridFS itself
+        IndexModel(
+            [("filename", ASCENDING), ("uploadDate", ASCENDING)],
+            name="filename_1_uploadDate_1",
+        ),
+    ],
+}
@@ -6,10 +6,21 @@ from pydantic import (
     validator,
     validator,
 )
-from typing import List, Optional, Union, Annotated
+from typing import (
+    List,
+    Optional,
+    Union,
+    Annotated,
+    Literal,
+    ClassVar,
+    get_args,
+    get_origin,
+)
 from datetime import datetime, date
 from fastapi import HTTPException
 from enum import Enum
+from functools import lru_cache, partial
+from decouple import config
 from schemas.custom_types import (
     User,
     Data,
@@ -101,18 +112,18 @@ class UserFactory(BaseModel):
     Represents a general user and acts as a factory for specific user types.
     """
 
+    role_to_class: ClassVar[dict] = {
+        User.ADMIN.value: Admin,
+        User.TEACHER.value: Teacher,
+        User.STUDENT.value: Student,
+        User.RELATIVE.value: Relative,
+    }
+
     @staticmethod
     def create_user(
         role: str, user_data: dict
     ) -> Union[Admin, Teacher, Student, Relative]:
-        role_to_class = {
-            User.ADMIN.value: Admin,
-            User.TEACHER.value: Teacher,
-            User.STUDENT.value: Student,
-            User.RELATIVE.value: Relative,
-        }
-
-        target_class = role_to_class.get(role)
+        target_class = UserFactory.role_to_class.get(role)
         if not target_class:
             raise ValueError("Invalid role")
 
@@ -125,6 +136,36 @@ class UserFactory(BaseModel):
         # Create the user object
         return target_class(**filtered_data)
 
+    @staticmethod
+    def create_trusted_user(role: str, user_data: dict) -> dict:
+        """
+        Shapes a user read from the dB like create_user(...).dict() without validating it again,
+        the documents were validated on write and the read projection already drops sensitive fields.
+        """
+        public_fields = trusted_user_fields.get(role)
+        if public_fields is None:
+            raise ValueError("Invalid role")
+
+        return {
+            field: user_data[field] if field in user_data else get_default()
+            for field, get_default in public_fields
+        }
+
+
+# Public fields of every role, with the factory of their default for documents missing them
+trusted_user_fields = {
+    role: tuple(
+        (
+            name,
+            (lambda: None)
+            if field.is_required()
+            else partial(field.get_default, call_default_factory=True),
+        )
+        for name, field in target_class.__fields__.items()
+    )
+    for role, target_class in UserFactory.role_to_class.items()
+}
+
 
 # Score schema
 class ScoreBase(BaseModel):
@@ -199,10 +240,94 @@ not_admin_users = {
 NotAdminUsers = Enum("NotAdminUsers", not_admin_users)
 
 
-def validate_query_over_schema(base_model: BaseModel, query: dict) -> BaseModel:
+@lru_cache(maxsize=config("QUERY_MODEL_CACHE_SIZE", default=256, cast=int))
+def get_query_sub_model(base_model: BaseModel, query_keys: frozenset) -> BaseModel:
+    """
+    Builds (once per schema and set of query keys) the partial model used to validate queries.
+    Size and hit rate are available through `get_query_sub_model.cache_info()`.
+    The whole field is kept so constraints like the Score limits also apply to the queries.
+    """
+    query_mathing_fields = {
+        field_name: (field.annotation, field)
+        for field_name, field in base_model.__fields__.items()
+        if field_name in query_keys
+    }
+
+    return create_model("QuerySubModel", **query_mathing_fields)
+
+
+def is_list_field(annotation) -> bool:
+    """
+    True for list fields, also when optional or in a union (e.g. Optional[list[str]]).
+    """
+    return get_origin(annotation) is list or any(
+        get_origin(x) is list for x in get_args(annotation)
+    )
+
+
+def is_optional_field(annotation) -> bool:
+    """
+    True for fields that accept None (e.g. Optional[str]).
+    """
+    return type(None) in get_args(annotation)
+
+
+# Comparison operators accepted in search queries, {"$between": [a, b]} is {"$gte": a, "$lte": b}
+range_operators = {"$gt", "$gte", "$lt", "$lte", "$between"}
+
+
+def is_range_query(value) -> bool:
+    return isinstance(value, dict) and bool(value) and set(value) <= range_operators
+
+
+def validate_range_over_schema(base_model: BaseModel, field: str, value: dict) -> dict:
+    """
+    Validates every bound of a range with the type of the field, only numbers, dates and strings can be compared.
+    Ids, passwords and phones are never compared.
+    """
+    # Comparing sensitive fields would leak them one bound at a time
+    if field == "id" or field.endswith("_id") or field in ("password", "phone"):
+        raise HTTPException(
+            status_code=422, detail=f"Range operators can't be used on {field}"
+        )
+
+    if "$between" in value:
+        bounds = value["$between"]
+        if not isinstance(bounds, list) or len(bounds) != 2 or set(value) - {"$between"}:
+            raise HTTPException(
+                status_code=422,
+                detail="$between takes a list of two bounds and can't be mixed with other operators",
+            )
+        value = {"$gte": bounds[0], "$lte": bounds[1]}
+
+    model = get_query_sub_model(base_model, frozenset([field]))
+    validated_range = {}
+    for operator, bound in value.items():
+        try:
+            validated_bound = getattr(model(**{field: bound}), field)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"The type of your query don't match the schema. Details: {str(e)}",
+            )
+        if isinstance(validated_bound, bool) or not isinstance(
+            validated_bound, (int, float, str, datetime, date)
+        ):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Range operators can only be used on numbers, dates and strings, not on {field}",
+            )
+        validated_range[operator] = validated_bound
+
+    return validated_range
+
+
+def validate_query_over_schema(
+    base_model: BaseModel, query: dict, allow_ranges: bool = False
+) -> BaseModel:
     # Extract keys from both query and model
     base_fields = set(base_model.__fields__)
-    query_keys = set(query.keys())
+    query_keys = frozenset(query.keys())
     unique_fields = query_keys - base_fields
 
     # If the query has different keys -> status_code 422
@@ -211,26 +336,85 @@ def validate_query_over_schema(base_model: BaseModel, query: dict) -> BaseModel:
             status_code=422, detail=f"You can only use this keys {base_fields}"
         )
 
-    query_mathing_fields = {
-        field_name: (field.annotation, field.default)
-        for field_name, field in base_model.__fields__.items()
-        if field_name in query_keys
-    }
+    # Search queries can compare a field with range operators instead of matching it
+    ranges = {}
+    if allow_ranges:
+        ranges = {
+            field: validate_range_over_schema(base_model, field, value)
+            for field, value in query.items()
+            if is_range_query(value)
+        }
+        query = {field: value for field, value in query.items() if field not in ranges}
+        query_keys = frozenset(query.keys())
 
-    model = create_model("QuerySubModel", **query_mathing_fields)
+    # Reuse the validator compiled for this query shape
+    model = get_query_sub_model(base_model, query_keys)
 
     # Try parsing the query in the newly created model to get full query validation
 
     try:
         validated_query = model(**query)
-        return validated_query.dict()
+        return {**validated_query.dict(), **ranges}
     except ValidationError as e:
         raise HTTPException(
             status_code=422,
             detail=f"The type of your query don't match the schema. Details: {str(e)}",
         )
 
-    # Create a new dynamic model
+
+class BatchReadItem(BaseModel):
+    """Schema representing one read of a batch, either by ids or by query."""
+
+    key: Optional[str] = None
+    collection: Union[User, Data]
+    ids: Optional[List[str]] = None
+    query: Optional[dict] = None
+
+    class Config:
+        extra = "forbid"
+
+    @validator("query", always=True)
+    def check_ids_or_query(cls, v, values):
+        if (v is None) == (values.get("ids") is None):
+            raise ValueError("Each item needs either ids or a query")
+
+        return v
+
+
+# Roles allowed to write each data collection, same as their routers
+data_write_roles = {
+    Data.CLASS: [User.ADMIN],
+    Data.SCORE: [User.TEACHER],
+    Data.ATTENDANCE: [User.TEACHER],
+}
+
+
+class BulkOperation(BaseModel):
+    """Schema representing one write of a bulk request."""
+
+    operation: Literal["insert", "update", "delete"]
+    collection: Data
+    document: Optional[dict] = None
+    query: Optional[dict] = None
+    update: Optional[dict] = None
+    multi: bool = False
+
+    class Config:
+        extra = "forbid"
+
+    @validator("update", always=True)
+    def check_operation_fields(cls, v, values):
+        operation = values.get("operation")
+        document, query = values.get("document"), values.get("query")
+
+        if operation == "insert" and (document is None or query or v):
+            raise ValueError("Inserts need only a document")
+        if operation == "update" and (query is None or v is None or document):
+            raise ValueError("Updates need a query and an update")
+        if operation == "delete" and (query is None or document or v):
+            raise ValueError("Deletes need only a query")
+
+        return v
 
 
 class ThingsFactory(BaseModel):
@@ -260,12 +444,3 @@ class ThingsFactory(BaseModel):
 
         # Create the user object
         return target_class(**filtered_data)
-
-
-
-
-
-
-
-
-
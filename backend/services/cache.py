@@ -0,0 +1,165 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from decouple import config
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import bson
+import hashlib
+import time
+
+
+class CacheBackend(ABC):
+    """
+    Storage used by the result cache. The operations map one to one to Redis commands
+    (GET, SET with EX, INCR), so a Redis-compatible server can back several workers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def get_counter(self, key: str) -> int:
+        ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Process local backend, evicts expired entries and then the least recently used ones
+    when going over `max_entries` or `max_bytes`.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+
+    def _delete(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.size_bytes -= len(value)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._delete(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size_bytes += len(value)
+
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            self._delete(next(iter(self._entries)))
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+
+class ResultCache:
+    """
+    Read-through cache of read results. Keys include the generation counter of every collection
+    a pipeline reads (joined ones included), so a write bumping a counter invalidates every
+    cached result depending on that collection.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _generation_key(db: AsyncIOMotorDatabase, collection: str) -> str:
+        return f"generation:{db.name}:{collection}"
+
+    async def _result_key(
+        self, db: AsyncIOMotorDatabase, collection: str, pipeline: list, multi: bool
+    ) -> str:
+        # Joined collections change the result as much as the main one
+        collections = [collection] + [
+            stage["$lookup"]["from"] for stage in pipeline if "$lookup" in stage
+        ]
+        generations = [
+            await self.backend.get_counter(self._generation_key(db, x))
+            for x in collections
+        ]
+        encoded = bson.encode(
+            {
+                "db": db.name,
+                "collection": collection,
+                "generations": generations,
+                "pipeline": pipeline,
+                "multi": multi,
+            }
+        )
+        return f"result:{hashlib.sha256(encoded).hexdigest()}"
+
+    async def get_or_load(
+        self,
+        db: AsyncIOMotorDatabase,
+        collection: str,
+        pipeline: list,
+        multi: bool,
+        load,
+    ):
+        """
+        Returns the cached result of the pipeline, or awaits `load()` and caches it when not empty.
+        Every call gets its own copy, so callers may modify the result.
+        """
+        if not self.enabled:
+            return await load()
+
+        key = await self._result_key(db, collection, pipeline, multi)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return bson.decode(cached)["result"]
+
+        self.misses += 1
+        result = await load()
+        if result:
+            await self.backend.set(key, bson.encode({"result": result}), self.ttl)
+        return result
+
+    async def invalidate(self, db: AsyncIOMotorDatabase, collection: str) -> None:
+        if self.enabled:
+            await self.backend.incr(self._generation_key(db, collection))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+result_cache = ResultCache(
+    backend=InMemoryCacheBackend(
+        max_entries=config("RESULT_CACHE_MAX_ENTRIES", default=1024, cast=int),
+        max_bytes=config("RESULT_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int),
+    ),
+    ttl=config("RESULT_CACHE_TTL", default=30, cast=float),
+    enabled=config("RESULT_CACHE_ENABLED", default=True, cast=bool),
+)
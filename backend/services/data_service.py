@@ -1,11 +1,19 @@
 from crud import crud, queries
 from schemas import schemas
-from services import encryption
+from services import encryption, cache, snapshots, rollups
 from fastapi import HTTPException
 from db.db_handler import get_db
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridOut
+from bson import ObjectId
+from bson.errors import InvalidId
 from typing import Generator, AsyncGenerator, Any
 from utils.setup import Setup
+from datetime import datetime
+import asyncio
+from pydantic import ValidationError
+from pymongo import errors as pymongo_errors
+from pymongo import InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany
+from utils import encoders, caching
 
 
 def get_collection_name(
@@ -28,40 +36,162 @@ def prepare_query(search_query: str | dict, key_to_schema_map: str):
     return schemas.validate_query_over_schema(
         base_model=schemas.complete_schema_mapping[key_to_schema_map],
         query=search_query,
+        allow_ranges=True,
     )
 
 
-async def read_service(
+def prepare_fields(
+    fields: str | None,
+    key_to_schema_map: str,
+    isSensitive: bool = False,
+    is_user_query: bool = True,
+) -> list[str] | None:
+    """
+    Validates a comma separated list of fields against the schema of the collection.
+    """
+    if not fields:
+        return None
+
+    base_fields = set(schemas.complete_schema_mapping[key_to_schema_map].__fields__)
+    if not isSensitive and is_user_query:
+        base_fields -= {"password", "phone"}
+
+    requested_fields = [field.strip() for field in fields.split(",") if field.strip()]
+    if not requested_fields or set(requested_fields) - base_fields:
+        raise HTTPException(
+            status_code=422, detail=f"You can only use this fields {base_fields}"
+        )
+
+    return requested_fields
+
+
+def prepare_sort(
+    sort: str | None,
+    key_to_schema_map: str,
+    isSensitive: bool = False,
+    is_user_query: bool = True,
+) -> list[tuple[str, int]] | None:
+    """
+    Validates a comma separated list of fields to sort by, "-" in front of a field sorts it descending.
+    Reference ids, list fields and optional fields can't be sorted on, the pagination
+    cursor compares the sort values with $gt/$lt which never match a missing or null value.
+    """
+    if not sort:
+        return None
+
+    schema = schemas.complete_schema_mapping[key_to_schema_map]
+    base_fields = {
+        name
+        for name, field in schema.__fields__.items()
+        if not name.endswith(f"_{Setup.id}")
+        and not schemas.is_list_field(field.annotation)
+        and (name == Setup.id or not schemas.is_optional_field(field.annotation))
+    }
+    if not isSensitive and is_user_query:
+        base_fields -= {"password", "phone"}
+
+    sort_fields = []
+    for field in (x.strip() for x in sort.split(",") if x.strip()):
+        name = field.lstrip("-")
+        if name not in base_fields or name in (x for x, _ in sort_fields):
+            raise HTTPException(
+                status_code=422, detail=f"You can only sort by this fields {base_fields}"
+            )
+        sort_fields.append((name, -1 if field.startswith("-") else 1))
+
+    # The id is the document _id, the tiebreaker of every sort
+    return [("_id" if x == f"{Setup.id}" else x, y) for x, y in sort_fields] or None
+
+
+def build_read_pipeline(
     search_query: str | dict,
     key_to_schema_map: schemas.complete_schema_mapping,
-    db: AsyncGenerator[AsyncIOMotorDatabase, None],
     isSensitive: bool = False,
     is_user_query: bool = True,
-    multi: bool = False,
     strict_mode: bool = False,
-):
+    limit: int | None = None,
+    after: str | None = None,
+    fields: str | None = None,
+    sort: str | None = None,
+) -> list:
     # Decode and validate input query against exact user class
     search_query = prepare_query(
         search_query=search_query,
         key_to_schema_map=key_to_schema_map,
     )
 
+    fields = prepare_fields(
+        fields=fields,
+        key_to_schema_map=key_to_schema_map,
+        isSensitive=isSensitive,
+        is_user_query=is_user_query,
+    )
+
+    sort = prepare_sort(
+        sort=sort,
+        key_to_schema_map=key_to_schema_map,
+        isSensitive=isSensitive,
+        is_user_query=is_user_query,
+    )
+
     # Creates a query suitable for the mongodb driver
-    pipeline = queries.get_read_query_for_mongo(
+    return queries.get_read_query_for_mongo(
         is_user_query=is_user_query,
         search_query=search_query,
         sensitive_data=isSensitive,
         strict_mode=strict_mode,
         key_to_schema_map=key_to_schema_map,
+        limit=limit,
+        after=encryption.decode_cursor(after, sort) if after else None,
+        fields=fields,
+        sort=sort,
     )
 
-    result = await crud.read_n_documents(
-        collection=get_collection_name(key_to_schema_map),
-        pipeline=pipeline,
-        db=db,
-        multi=multi,
+
+async def read_service(
+    search_query: str | dict,
+    key_to_schema_map: schemas.complete_schema_mapping,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    isSensitive: bool = False,
+    is_user_query: bool = True,
+    multi: bool = False,
+    strict_mode: bool = False,
+    limit: int | None = None,
+    after: str | None = None,
+    fields: str | None = None,
+    sort: str | None = None,
+):
+    pipeline = build_read_pipeline(
+        search_query=search_query,
+        key_to_schema_map=key_to_schema_map,
+        isSensitive=isSensitive,
+        is_user_query=is_user_query,
+        strict_mode=strict_mode,
+        # One extra document tells build_list_response if there is a next page
+        limit=limit + 1 if multi and limit else None,
+        after=after if multi else None,
+        fields=fields,
+        sort=sort if multi else None,
     )
 
+    collection = get_collection_name(key_to_schema_map)
+
+    async def load():
+        return await crud.read_n_documents(
+            collection=collection,
+            pipeline=pipeline,
+            db=db,
+            multi=multi,
+        )
+
+    # Sensitive reads (e.g. signin) always go to the dB
+    if isSensitive:
+        result = await load()
+    else:
+        result = await cache.result_cache.get_or_load(
+            db=db, collection=collection, pipeline=pipeline, multi=multi, load=load
+        )
+
     # Handle query results
     if not result:
         raise HTTPException(status_code=404, detail="Item NOT found.")
@@ -70,6 +200,346 @@ async def read_service(
     return result
 
 
+async def count_service(
+    search_query: str | dict,
+    key_to_schema_map: schemas.complete_schema_mapping,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    strict_mode: bool = False,
+) -> int:
+    """
+    Counts the documents matching a query without reading or joining them.
+    An empty query is answered from the collection metadata.
+    """
+    search_query = prepare_query(
+        search_query=search_query,
+        key_to_schema_map=key_to_schema_map,
+    )
+    search_query_mongo = queries.transform_data_types_for_mongodb(
+        query=search_query,
+        isSearching=True,
+        strict_mode=strict_mode,
+    )
+    collection = get_collection_name(key_to_schema_map)
+
+    async def load():
+        if not search_query_mongo:
+            return await crud.estimate_n_documents(collection=collection, db=db)
+        return await crud.count_n_documents(
+            collection=collection, search_query=search_query_mongo, db=db
+        )
+
+    return await cache.result_cache.get_or_load(
+        db=db,
+        collection=collection,
+        pipeline=[{"$match": search_query_mongo}, {"$count": "count"}],
+        multi=False,
+        load=load,
+    )
+
+
+async def stream_service(
+    search_query: str | dict,
+    key_to_schema_map: schemas.complete_schema_mapping,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    isSensitive: bool = False,
+    is_user_query: bool = True,
+    strict_mode: bool = False,
+    limit: int | None = None,
+    after: str | None = None,
+    fields: str | None = None,
+    sort: str | None = None,
+) -> AsyncGenerator[bytes, None]:
+    """
+    Validates the query up front and returns a generator writing each matching document as an NDJSON line.
+    Documents are pulled from the cursor in batches, so memory stays flat whatever the result size.
+    """
+    pipeline = build_read_pipeline(
+        search_query=search_query,
+        key_to_schema_map=key_to_schema_map,
+        isSensitive=isSensitive,
+        is_user_query=is_user_query,
+        strict_mode=strict_mode,
+        limit=limit,
+        after=after,
+        fields=fields,
+        sort=sort,
+    )
+
+    documents = crud.stream_n_documents(
+        collection=get_collection_name(key_to_schema_map),
+        pipeline=pipeline,
+        db=db,
+        batch_size=Setup.stream_batch_size,
+    )
+
+    async def ndjson_lines():
+        async for document in documents:
+            caching.pop_versions(document)
+            yield encoders.to_ndjson_line(document)
+
+    return ndjson_lines()
+
+
+async def export_service(
+    search_query: str | dict,
+    key_to_schema_map: schemas.complete_schema_mapping,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    file_format: str = "ndjson",
+    fields: str | None = None,
+    compress: bool = False,
+) -> AsyncGenerator[bytes, None]:
+    """
+    Validates the query up front and returns a generator writing the whole matching collection
+    as CSV (with a header row) or NDJSON, optionally gzipped. Memory stays flat like stream_service.
+    """
+    is_user_query = key_to_schema_map in schemas.role_schema_map
+    search_query = prepare_query(
+        search_query=search_query,
+        key_to_schema_map=key_to_schema_map,
+    )
+    fields = prepare_fields(
+        fields=fields,
+        key_to_schema_map=key_to_schema_map,
+        is_user_query=is_user_query,
+    )
+    pipeline = queries.get_export_query_for_mongo(
+        search_query=search_query,
+        is_user_query=is_user_query,
+        key_to_schema_map=key_to_schema_map,
+        fields=fields,
+    )
+
+    documents = crud.stream_n_documents(
+        collection=get_collection_name(key_to_schema_map),
+        pipeline=pipeline,
+        db=db,
+        batch_size=Setup.stream_batch_size,
+    )
+
+    if file_format == "csv":
+        # Without fields the columns are the schema ones, the same the import endpoint reads
+        schema_fields = [
+            field
+            for field in schemas.complete_schema_mapping[key_to_schema_map].__fields__
+            if not (is_user_query and field in ("password", "phone"))
+        ]
+        columns = list(dict.fromkeys([f"{Setup.id}", *(fields or schema_fields)]))
+
+        async def lines():
+            yield encoders.to_csv_line(columns)
+            async for document in documents:
+                yield encoders.to_csv_line([document.get(x) for x in columns])
+
+    else:
+
+        async def lines():
+            async for document in documents:
+                yield encoders.to_ndjson_line(document)
+
+    return encoders.gzip_chunks(lines()) if compress else lines()
+
+
+async def score_analytics_service(
+    scope: str,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    ids: list[str] | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list[dict]:
+    """
+    Averages, counts and distributions of the scores of students, teachers or classes.
+    Read from the daily rollups, a class adds up the rollups of its students.
+    """
+
+    async def load(scope: str, ref_ids: list[str] | None) -> dict[str, dict]:
+        totals = await crud.read_n_documents(
+            collection=Setup.score_rollups,
+            pipeline=queries.get_score_analytics_query(
+                scope=scope, ref_ids=ref_ids, date_from=date_from, date_to=date_to
+            ),
+            db=db,
+            multi=True,
+        )
+        return {x["_id"]: x for x in totals}
+
+    if scope == schemas.Data.CLASS.value:
+        try:
+            search_query = (
+                {"_id": {"$in": queries.convert_id_to_object_id(ids)}} if ids else {}
+            )
+        except InvalidId as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+        classes = await crud.find_n_documents(
+            collection=schemas.Data.CLASS.value,
+            search_query=search_query,
+            projection={"students_id": 1},
+            db=db,
+        )
+        members = {
+            str(x["_id"]): [str(y) for y in x.get("students_id") or []] for x in classes
+        }
+        totals = await load("students", sorted({y for x in members.values() for y in x}))
+        groups = {
+            class_id: [totals[x] for x in students if x in totals]
+            for class_id, students in members.items()
+        }
+    else:
+        totals = await load(scope, ids)
+        # Requested ids without scores are returned with a zero count
+        groups = {
+            ref_id: [totals[ref_id]] if ref_id in totals else []
+            for ref_id in ids or totals
+        }
+
+    return [to_score_analytics(ref_id, group) for ref_id, group in groups.items()]
+
+
+async def attendance_summary_service(
+    classes_id: str,
+    period: str,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list[dict]:
+    """
+    Registers and present students of a class per day or month, read from the summaries.
+    """
+    summaries = await crud.find_n_documents(
+        collection=Setup.attendance_summaries,
+        search_query=queries.get_attendance_summary_query(
+            classes_id=classes_id, period=period, date_from=date_from, date_to=date_to
+        ),
+        projection={"_id": 0, "classes_id": 0, "period": 0},
+        db=db,
+    )
+
+    return [
+        {
+            **x,
+            "students_average": x["students_present"] / x["registers"],
+        }
+        for x in sorted(summaries, key=lambda x: x["date"])
+        if x["registers"] > 0
+    ]
+
+
+def to_score_analytics(ref_id: str, totals: list[dict]) -> dict:
+    def total(field: str) -> int:
+        return sum(x.get(field, 0) for x in totals)
+
+    count = total("count")
+    return {
+        f"{Setup.id}": ref_id,
+        "count": count,
+        **{
+            score: {
+                "average": total(f"{score}_sum") / count if count else None,
+                "distribution": {
+                    str(value): total(f"{score}_{value}") for value in Setup.score_values
+                },
+            }
+            for score in ("classes", "breaks")
+        },
+    }
+
+
+async def batch_read_service(
+    items: list[schemas.BatchReadItem],
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+) -> dict:
+    """
+    Resolves many reads at once: the ids asked for the same collection are read with a single
+    $in aggregation, queries run as they are, and everything runs concurrently.
+    """
+    ids_by_collection: dict[str, set[str]] = {}
+    for item in items:
+        if item.ids is not None:
+            for id_ in item.ids:
+                if not ObjectId.is_valid(id_):
+                    raise HTTPException(status_code=422, detail=f"Invalid id {id_}")
+            ids_by_collection.setdefault(item.collection.value, set()).update(item.ids)
+
+    async def read_ids(collection: str, ids: set[str]) -> dict:
+        pipeline = queries.get_read_query_for_mongo(
+            search_query={f"{Setup.id}": list(ids)},
+            is_user_query=collection in [x.value for x in schemas.User],
+            key_to_schema_map=collection,
+        )
+
+        async def load():
+            return await crud.read_n_documents(
+                collection=collection, pipeline=pipeline, db=db, multi=True
+            )
+
+        documents = await cache.result_cache.get_or_load(
+            db=db, collection=collection, pipeline=pipeline, multi=True, load=load
+        )
+        return {document[f"{Setup.id}"]: document for document in documents}
+
+    async def read_query(item: schemas.BatchReadItem) -> list:
+        try:
+            return await read_service(
+                search_query=item.query,
+                key_to_schema_map=item.collection,
+                db=db,
+                is_user_query=isinstance(item.collection, schemas.User),
+                multi=True,
+            )
+        except HTTPException as e:
+            if e.status_code == 404:
+                return []
+            raise e
+
+    query_items = [item for item in items if item.query is not None]
+    results = await asyncio.gather(
+        *[read_ids(collection, ids) for collection, ids in ids_by_collection.items()],
+        *[read_query(item) for item in query_items],
+    )
+    documents_by_collection = dict(zip(ids_by_collection, results))
+    query_results = dict(zip(map(id, query_items), results[len(ids_by_collection) :]))
+
+    response = {}
+    for index, item in enumerate(items):
+        if item.ids is not None:
+            documents = documents_by_collection[item.collection.value]
+            result = [documents[x] for x in item.ids if x in documents]
+        else:
+            result = query_results[id(item)]
+        response[item.key or str(index)] = result
+
+    for result in response.values():
+        caching.pop_versions(result)
+
+    return response
+
+
+def build_list_response(
+    data: list | dict,
+    limit: int | None = None,
+    key_to_schema_map: str | None = None,
+    sort: str | None = None,
+) -> dict:
+    """
+    Formats the results of a read, adding the cursor of the next page when there is one.
+    With a sort the cursor also carries the sort values of the last document.
+    """
+    if not isinstance(data, list):
+        return {"results": data, "count": None}
+
+    next_cursor = None
+    if limit and len(data) > limit:
+        data = data[:limit]
+        sort = prepare_sort(sort, key_to_schema_map) if sort else None
+        next_cursor = encryption.encode_cursor(
+            data[-1][f"{Setup.id}"],
+            sort=sort,
+            values=[data[-1].get(field) for field, _ in sort or [] if field != "_id"],
+        )
+
+    return {"results": data, "count": len(data), "next": next_cursor}
+
+
 async def update_service(
     search_query: str | dict,
     update_query: dict,
@@ -94,10 +564,23 @@ async def update_service(
         update_data=update_query,
     )
 
+    # New references get their snapshots written with them
+    if Setup.denormalized_details:
+        await snapshots.add_snapshots(
+            [update_query_mongo["$set"]], key_to_schema_map, db
+        )
+
+    # Rollups are moved from the current state of the documents to the updated one
+    before = await rollups.capture(
+        get_collection_name(key_to_schema_map), search_query_mongo, db
+    )
+
     # Send query to dB
     result = await crud.update_n_documents(
         collection=get_collection_name(key_to_schema_map),
-        search_query=search_query_mongo,
+        search_query=queries.add_changed_filter(
+            search_query_mongo, update_query_mongo
+        ),
         update_query=update_query_mongo,
         multi=multi,
         db=db,
@@ -105,9 +588,17 @@ async def update_service(
 
     # Check if the update was successful
     if result.matched_count == 0:
-        raise HTTPException(
-            status_code=404, detail=f"No item found with {search_query}."
+        # Nothing changed: either the documents don't exist or they are already up to date
+        exists = await crud.count_n_documents(
+            collection=get_collection_name(key_to_schema_map),
+            search_query=search_query_mongo,
+            db=db,
+            limit=1,
         )
+        if not exists:
+            raise HTTPException(
+                status_code=404, detail=f"No item found with {search_query}."
+            )
 
     if result.modified_count < 1:
         raise HTTPException(
@@ -115,6 +606,17 @@ async def update_service(
             detail="The dB was already up to date.",
         )
 
+    await cache.result_cache.invalidate(db, get_collection_name(key_to_schema_map))
+    await rollups.sync(get_collection_name(key_to_schema_map), db, before)
+
+    # Documents referencing the updated ones keep a copy of some of their fields
+    if Setup.denormalized_details and set(update_query) & set(Setup.snapshot_fields):
+        await snapshots.refresh_snapshots(
+            collection=get_collection_name(key_to_schema_map),
+            search_query=search_query_mongo,
+            db=db,
+        )
+
     # Return a success response if the update is successful
     return {
         "status": "Fields have been modified successfully",
@@ -137,6 +639,11 @@ async def create_service(
     # Transform query for mongodB
     document_data = queries.get_create_query_for_mongo(document=document_data)
 
+    if Setup.denormalized_details:
+        await snapshots.add_snapshots(
+            document_data if multi else [document_data], key_to_schema_map, db
+        )
+
     # Send Query to dB
     inserted_ids = await crud.create_n_documents(
         collection=key_to_schema_map,
@@ -149,6 +656,14 @@ async def create_service(
     if not inserted_ids:
         raise HTTPException(status_code=500, detail="Creation was NOT successful")
 
+    await cache.result_cache.invalidate(db, get_collection_name(key_to_schema_map))
+    await rollups.sync(
+        collection=get_collection_name(key_to_schema_map),
+        db=db,
+        before=[],
+        ids=inserted_ids if multi else [inserted_ids],
+    )
+
     if multi:
         result = [str(id) for id in inserted_ids]
     else:
@@ -174,10 +689,26 @@ async def delete_service(
     )
     # Transform the query for mongo dB
     search_query_for_mongo = queries.get_delete_query_for_mongo(search_query)
+    collection = get_collection_name(key_to_schema_map)
+
+    # Snapshots of deleted documents have to be removed from the documents referencing them
+    referenced_ids = []
+    if Setup.denormalized_details and snapshots.get_referencing_fields(collection):
+        referenced_ids = [
+            str(x["_id"])
+            for x in await crud.find_n_documents(
+                collection=collection,
+                search_query=search_query_for_mongo,
+                projection={"_id": 1},
+                db=db,
+            )
+        ]
+
+    before = await rollups.capture(collection, search_query_for_mongo, db)
 
     # Delete the user from the database
     result = await crud.delete_n_documents(
-        collection=get_collection_name(key_to_schema_map),
+        collection=collection,
         search_query=search_query_for_mongo,
         db=db,
         multi=multi,
@@ -186,6 +717,15 @@ async def delete_service(
     # Handle results
     if result.deleted_count < 1:
         raise HTTPException(status_code=410, detail="Deletion Failed")
+
+    await cache.result_cache.invalidate(db, collection)
+    await rollups.sync(collection, db, before)
+
+    if referenced_ids:
+        await snapshots.remove_snapshots(
+            collection, referenced_ids if multi else referenced_ids[:1], db
+        )
+
     # Return a success response upon successful deletion
     return {
         "status": "Item deleted successfully",
@@ -193,14 +733,198 @@ async def delete_service(
     }
 
 
+async def bulk_write_service(
+    operations: list[schemas.BulkOperation],
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    token_payload: dict,
+) -> dict:
+    """
+    Validates every operation with the collection schema, then sends the valid ones with one
+    unordered bulk_write per collection. An invalid or failed operation doesn't stop the others.
+    Drivers only return aggregated counts, so each operation reports an ok or error status.
+    """
+    statuses: list[dict] = [{} for _ in operations]
+    prepared: dict[str, list[tuple[int, schemas.BulkOperation, dict]]] = {}
+
+    # Validate and transform every operation for mongo db
+    for index, operation in enumerate(operations):
+        try:
+            roles = schemas.data_write_roles[operation.collection]
+            if token_payload[f"{Setup.role}"] not in roles:
+                raise HTTPException(
+                    status_code=401, detail=f"Only {roles} can do this action."
+                )
+            prepared.setdefault(operation.collection.value, []).append(
+                (index, operation, prepare_bulk_operation(operation, token_payload))
+            )
+        except HTTPException as e:
+            statuses[index] = {"status": "error", "detail": e.detail}
+        except (ValidationError, InvalidId) as e:
+            statuses[index] = {"status": "error", "detail": str(e)}
+
+    async def write_collection(collection: str, items: list) -> dict:
+        if Setup.denormalized_details:
+            written = [
+                query["document"] if "document" in query else query["update"]["$set"]
+                for _, operation, query in items
+                if operation.operation != "delete"
+            ]
+            await snapshots.add_snapshots(written, collection, db)
+
+        # Snapshots of deleted documents have to be removed from the documents referencing them
+        deleted_ids = []
+        if Setup.denormalized_details and snapshots.get_referencing_fields(collection):
+            for _, operation, query in items:
+                if operation.operation == "delete":
+                    deleted_ids += [
+                        str(x["_id"])
+                        for x in await crud.find_n_documents(
+                            collection=collection,
+                            search_query=query["search"],
+                            projection={"_id": 1},
+                            db=db,
+                        )
+                    ]
+
+        # Rollups are moved from the current state of the documents to the written one
+        before = {}
+        if rollups.is_tracked(collection):
+            for _, operation, query in items:
+                if operation.operation != "insert":
+                    for document in await rollups.capture(
+                        collection, query["search"], db
+                    ):
+                        before[document["_id"]] = document
+
+        requests = [to_bulk_request(operation, query) for _, operation, query in items]
+        for index, operation, query in items:
+            statuses[index] = {"status": "ok"}
+            if operation.operation == "insert":
+                statuses[index][f"{Setup.id}"] = str(query["document"]["_id"])
+
+        try:
+            result = (
+                await crud.bulk_write_documents(collection, requests, db)
+            ).bulk_api_result
+        except pymongo_errors.BulkWriteError as e:
+            result = e.details
+            for error in result["writeErrors"]:
+                index = items[error["index"]][0]
+                statuses[index] = {"status": "error", "detail": error["errmsg"]}
+
+        await cache.result_cache.invalidate(db, collection)
+        await rollups.sync(
+            collection,
+            db,
+            list(before.values()),
+            ids=[
+                query["document"]["_id"]
+                for index, operation, query in items
+                if operation.operation == "insert"
+                and statuses[index]["status"] == "ok"
+            ],
+        )
+        if deleted_ids:
+            await snapshots.remove_snapshots(collection, deleted_ids, db)
+        if Setup.denormalized_details:
+            for _, operation, query in items:
+                if operation.operation == "update" and set(
+                    query["update"]["$set"]
+                ) & set(Setup.snapshot_fields):
+                    await snapshots.refresh_snapshots(collection, query["search"], db)
+
+        return {
+            "inserted": result["nInserted"],
+            "matched": result["nMatched"],
+            "modified": result["nModified"],
+            "deleted": result["nRemoved"],
+        }
+
+    counts = await asyncio.gather(
+        *[write_collection(collection, items) for collection, items in prepared.items()]
+    )
+
+    return {"results": statuses, "counts": dict(zip(prepared, counts))}
+
+
+def prepare_bulk_operation(
+    operation: schemas.BulkOperation, token_payload: dict
+) -> dict:
+    key_to_schema_map = operation.collection
+
+    if operation.operation == "insert":
+        document = operation.document
+        # Teachers writing scores are their teacher by default
+        if key_to_schema_map == schemas.Data.SCORE and not document.get("teachers_id"):
+            document = {**document, "teachers_id": token_payload[f"{Setup.id}"]}
+
+        model = schemas.complete_schema_mapping[key_to_schema_map](**document)
+        document = queries.get_create_query_for_mongo(document=model.dict())
+        document["_id"] = ObjectId()
+        crud.stamp_new_documents([document])
+        return {"document": document}
+
+    search_query = prepare_query(
+        search_query=operation.query,
+        key_to_schema_map=key_to_schema_map,
+    )
+
+    if operation.operation == "delete":
+        return {"search": queries.get_delete_query_for_mongo(search_query)}
+
+    update_query = schemas.validate_query_over_schema(
+        base_model=schemas.complete_schema_mapping[key_to_schema_map],
+        query=operation.update,
+    )
+    search_query_mongo, update_query_mongo = queries.get_update_query_for_mongo(
+        search_query=search_query,
+        update_data=update_query,
+    )
+    return {"search": search_query_mongo, "update": update_query_mongo}
+
+
+def to_bulk_request(operation: schemas.BulkOperation, query: dict):
+    if operation.operation == "insert":
+        return InsertOne(query["document"])
+
+    if operation.operation == "delete":
+        request = DeleteMany if operation.multi else DeleteOne
+        return request(query["search"])
+
+    request = UpdateMany if operation.multi else UpdateOne
+    return request(
+        queries.add_changed_filter(query["search"], query["update"]),
+        crud.versioned_update(query["update"]),
+    )
+
+
 async def profile_pic_service(
     user_id: str,
     user_role: str,
     db: AsyncGenerator[AsyncIOMotorDatabase, None],
-    base64_image: str,
+    variants: dict[str, bytes],
+    content_type: str,
 ):
+    # Store every variant in GridFS, the user document only keeps the picture URL
+    picture_id = ObjectId()
+    for variant, image in variants.items():
+        await crud.upload_file(
+            bucket=Setup.profile_pic_bucket,
+            filename=f"{user_role}_{user_id}_{variant}",
+            data=image,
+            metadata={
+                "user_id": user_id,
+                "role": user_role,
+                "picture_id": picture_id,
+                "variant": variant,
+                "content_type": content_type,
+            },
+            db=db,
+        )
+    profile_pic_url = Setup.profile_pic_url.format(picture_id=picture_id)
+
     search_query, update_query = queries.get_update_profile_pic_query(
-        user_id, base64_image
+        user_id, profile_pic_url
     )
 
     result = await crud.update_n_documents(
@@ -213,18 +937,59 @@ async def profile_pic_service(
 
     # Check if the update was successful
     if result.matched_count == 0:
+        await crud.delete_files(
+            bucket=Setup.profile_pic_bucket,
+            search_query={"metadata.picture_id": picture_id},
+            db=db,
+        )
         raise HTTPException(
             status_code=404, detail=f"No user found with {search_query}."
         )
 
-    if result.modified_count < 1:
-        raise HTTPException(
-            status_code=200,
-            detail="The dB was already up to date.",
-        )
+    await cache.result_cache.invalidate(db, get_collection_name(user_role))
+
+    # The previous pictures are not referenced anymore
+    await delete_profile_pics_service(user_id=user_id, db=db, keep=picture_id)
 
     # Return a success response if the update is successful
     return {
         "status": "Fields have been modified successfully",
         "count": result.modified_count,
+        "profile_pic": profile_pic_url,
     }
+
+
+async def read_profile_pic_service(
+    picture_id: str,
+    variant: str,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+) -> AsyncIOMotorGridOut:
+    try:
+        search_query = {
+            "metadata.picture_id": ObjectId(picture_id),
+            "metadata.variant": variant,
+        }
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Picture NOT found.")
+
+    grid_out = await crud.find_file(
+        bucket=Setup.profile_pic_bucket, search_query=search_query, db=db
+    )
+    if grid_out is None:
+        raise HTTPException(status_code=404, detail="Picture NOT found.")
+
+    return grid_out
+
+
+async def delete_profile_pics_service(
+    user_id: str,
+    db: AsyncGenerator[AsyncIOMotorDatabase, None],
+    keep: ObjectId = None,
+) -> int:
+    search_query = {"metadata.user_id": user_id}
+    if keep:
+        search_query["metadata.picture_id"] = {"$ne": keep}
+
+    return await crud.delete_files(
+        bucket=Setup.profile_pic_bucket, search_query=search_query, db=db
+    )
@@ -3,12 +3,22 @@ import jwt
 from datetime import datetime, timedelta
 from decouple import config
 from utils.setup import Setup
+from utils.workers import BoundedProcessPool
 from fastapi import HTTPException, Request
 from schemas import schemas, custom_types
 from urllib.parse import parse_qs
 from typing import Union
+from collections import OrderedDict
+import asyncio
+import hashlib
 import json
+import os
+import threading
+import time
 import urllib.parse
+import base64
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
 
 JWT_SECRET = config("JWT_SECRET")
 JWT_ALGORITHM = config("JWT_ALGORITHM")
@@ -38,6 +48,13 @@ def encrypt_password(password: str):
     return pwd_context.hash(password)
 
 
+def encrypt_passwords(passwords: list[str]) -> list[str]:
+    """
+    Encrypt many plain passwords in a single worker call.
+    """
+    return [pwd_context.hash(x) for x in passwords]
+
+
 def check_password(plain_password: str, hashed_password: str):
     """
     Verify a plain password against the hashed version.
@@ -45,6 +62,43 @@ def check_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasher(BoundedProcessPool):
+    """
+    Runs bcrypt hashing and verification beside the event loop instead of on it.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = config(
+            "PASSWORD_HASH_WORKERS", default=os.cpu_count() or 1, cast=int
+        ),
+        max_pending: int = config("PASSWORD_HASH_MAX_PENDING", default=64, cast=int),
+        queue_timeout: float = config(
+            "PASSWORD_HASH_QUEUE_TIMEOUT", default=10, cast=float
+        ),
+    ):
+        super().__init__(max_workers, max_pending, queue_timeout)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(encrypt_password, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Splits the passwords in one slice per worker so a large batch takes
+        `max_workers` queue slots instead of one per password.
+        """
+        size = max(1, -(-len(passwords) // self.max_workers))
+        slices = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+        hashed = await asyncio.gather(*[self.run(encrypt_passwords, x) for x in slices])
+        return [x for part in hashed for x in part]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(check_password, plain_password, hashed_password)
+
+
+password_hasher = PasswordHasher()
+
+
 def check_token(token: str):
     """
     Check if the JWT token is valid.
@@ -56,6 +110,62 @@ def check_token(token: str):
         return False
 
 
+class TokenCache:
+    """
+    Bounded LRU cache of already verified JWT payloads keyed by the token digest.
+    Entries are dropped once the token `exp` claim is in the past.
+    """
+
+    def __init__(
+        self, max_size: int = config("TOKEN_CACHE_SIZE", default=1024, cast=int)
+    ):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        # Sync dependencies run in the threadpool, so access must be serialized
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._digest(token)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None and payload[Setup.expiration] <= time.time():
+                del self._entries[key]
+                payload = None
+
+            if payload is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(payload)
+
+    def put(self, token: str, payload: dict) -> None:
+        # Tokens without expiration are never cached
+        if Setup.expiration not in payload or self.max_size <= 0:
+            return
+
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = dict(payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
 async def read_token_from_header(request: Request) -> dict:
     authorization: str = request.headers.get("Authorization")
 
@@ -66,33 +176,25 @@ async def read_token_from_header(request: Request) -> dict:
         raise HTTPException(status_code=401, detail="Invalid 'Authorization' header")
 
     token = authorization.split(" ")[1]
-
-    if not check_token(token):
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    try:
-        # Decode the token
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    return read_token(token)
 
 
 def read_token(token: str) -> dict:
-    if not check_token(token):
-        raise HTTPException(status_code=401, detail="Invalid token")
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
 
     try:
-        # Decode the token
+        # Decode and verify the token in a single pass
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    token_cache.put(token, payload)
+    return payload
+
 
 def check_admin(token):
     token_payload: dict = read_token(token)
@@ -130,6 +232,37 @@ def decode_query(query: str) -> dict:
     return decoded_result
 
 
+def encode_cursor(last_id: str, sort: list = None, values: list = None) -> str:
+    """
+    Encodes the id and the sort values of the last document of a page into an opaque pagination cursor.
+    Extended JSON keeps the BSON types of the values (e.g. dates) across requests.
+    """
+    payload = {"after": last_id}
+    if sort:
+        payload.update({"sort": sort, "values": values})
+    return base64.urlsafe_b64encode(json_util.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: list = None) -> dict:
+    """
+    Decodes a pagination cursor created by `encode_cursor`, it can only be used with the same sort.
+    """
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after = ObjectId(payload["after"])
+        values = payload.get("values") or []
+        same_sort = [tuple(x) for x in payload.get("sort") or []] == list(sort or [])
+    except (ValueError, TypeError, KeyError, InvalidId):
+        raise HTTPException(status_code=422, detail="Invalid pagination cursor")
+
+    sort_fields = [field for field, _ in sort or [] if field != "_id"]
+    if not same_sort or len(values) != len(sort_fields):
+        raise HTTPException(
+            status_code=422, detail="The pagination cursor was created with another sort"
+        )
+    return {"after": after, "values": values}
+
+
 def decode_and_validate_query(
     query: str, key_to_schema_map: Union[schemas.User, schemas.Data]
 ) -> dict:
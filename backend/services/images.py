@@ -0,0 +1,83 @@
+from PIL import Image, ImageOps
+from fastapi import HTTPException, UploadFile
+from decouple import config
+from utils.workers import BoundedProcessPool
+from io import BytesIO
+import os
+
+MAX_UPLOAD_SIZE = config("PROFILE_PIC_MAX_BYTES", default=10 * 1024 * 1024, cast=int)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Longest side in pixels of every stored variant
+IMAGE_VARIANTS = {
+    "thumbnail": 128,
+    "card": 384,
+    "full": 1280,
+}
+IMAGE_FORMAT = "WEBP"
+IMAGE_CONTENT_TYPE = "image/webp"
+IMAGE_QUALITY = 80
+
+
+async def read_upload(file: UploadFile, max_size: int = MAX_UPLOAD_SIZE) -> bytes:
+    """
+    Reads an uploaded file in chunks, rejecting it as soon as it goes over `max_size` bytes.
+    """
+    buffer = BytesIO()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if buffer.tell() + len(chunk) > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"The file can't be bigger than {max_size // (1024 * 1024)}MB.",
+            )
+        buffer.write(chunk)
+
+    return buffer.getvalue()
+
+
+def render_variants(data: bytes) -> dict[str, bytes]:
+    """
+    Decodes an image and re-encodes it in every size of IMAGE_VARIANTS.
+    Runs in a worker process, raises ValueError if the data is not a valid image.
+    """
+    try:
+        image = Image.open(BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Invalid image: {e}")
+
+    variants = {}
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        output = BytesIO()
+        resized.save(output, format=IMAGE_FORMAT, quality=IMAGE_QUALITY, method=4)
+        variants[variant] = output.getvalue()
+
+    return variants
+
+
+class ImageProcessor(BoundedProcessPool):
+    """
+    Decodes and resizes uploaded images beside the event loop instead of on it.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = config(
+            "IMAGE_WORKERS", default=os.cpu_count() or 1, cast=int
+        ),
+        max_pending: int = config("IMAGE_MAX_PENDING", default=16, cast=int),
+        queue_timeout: float = config("IMAGE_QUEUE_TIMEOUT", default=10, cast=float),
+    ):
+        super().__init__(max_workers, max_pending, queue_timeout)
+
+    async def render(self, data: bytes) -> dict[str, bytes]:
+        try:
+            return await self.run(render_variants, data)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+
+image_processor = ImageProcessor()
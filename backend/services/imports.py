@@ -0,0 +1,207 @@
+from crud import crud, queries
+from schemas import schemas
+from services import cache, encryption, snapshots
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import errors as pymongo_errors
+from collections import OrderedDict
+from typing import Literal, get_origin
+from decouple import config
+from utils.setup import Setup
+from utils.encoders import CSV_LIST_SEPARATOR
+import asyncio
+import csv
+import io
+import json
+import uuid
+
+ImportFormat = Literal["csv", "ndjson"]
+
+IMPORT_MAX_BYTES = config("IMPORT_MAX_BYTES", default=20 * 1024 * 1024, cast=int)
+IMPORT_CHUNK_SIZE = config("IMPORT_CHUNK_SIZE", default=500, cast=int)
+IMPORT_MAX_JOBS = config("IMPORT_MAX_JOBS", default=100, cast=int)
+
+
+class ImportJob:
+    """
+    Progress of one import, rows are numbered from 1 in the order of the file.
+    """
+
+    def __init__(self, user_role: schemas.User, total: int):
+        self.id = uuid.uuid4().hex
+        self.user_role = user_role
+        self.total = total
+        self.status = "pending"
+        self.processed = 0
+        self.inserted = 0
+        self.errors: list[dict] = []
+        self.detail: str | None = None
+
+    def add_error(self, row: int, detail: str) -> None:
+        self.errors.append({"row": row, "detail": detail})
+
+    def report(self) -> dict:
+        return {
+            "id": self.id,
+            "user_role": self.user_role.value,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda x: x["row"]),
+            "detail": self.detail,
+        }
+
+
+class ImportJobs:
+    """
+    Process local registry of the imports, only the last `max_jobs` are kept.
+    With several workers the progress must be polled on the worker that started the import.
+    """
+
+    def __init__(self, max_jobs: int = IMPORT_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, ImportJob] = OrderedDict()
+
+    def create(self, user_role: schemas.User, total: int) -> ImportJob:
+        job = ImportJob(user_role, total)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> ImportJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Import not found")
+        return job
+
+
+def parse_rows(
+    data: bytes, file_format: ImportFormat, user_role: schemas.User
+) -> list[dict | str]:
+    """
+    Splits an upload in raw rows. Rows that can't be parsed are kept as their error message,
+    so they are reported with the validation errors.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=422, detail="The file must be UTF-8 encoded")
+
+    if file_format == "ndjson":
+        rows = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = f"Invalid JSON: {e}"
+            rows.append(row if isinstance(row, (dict, str)) else "Rows must be objects")
+        return rows
+
+    # CSV cells are strings: empty cells fall back to the schema defaults and
+    # list fields hold their values separated by CSV_LIST_SEPARATOR
+    schema = schemas.complete_schema_mapping[user_role.value]
+    list_fields = {
+        name
+        for name, field in schema.__fields__.items()
+        if get_origin(field.annotation) is list
+    }
+    rows = []
+    for row in csv.DictReader(io.StringIO(text)):
+        if None in row:
+            rows.append("The row has more cells than the header")
+            continue
+        rows.append(
+            {
+                key: value.split(CSV_LIST_SEPARATOR) if key in list_fields else value
+                for key, value in row.items()
+                if value not in ("", None)
+            }
+        )
+    return rows
+
+
+async def insert_chunk(
+    job: ImportJob,
+    rows: list[tuple[int, dict | str]],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    schema = schemas.complete_schema_mapping[job.user_role.value]
+
+    valid: list[tuple[int, schemas.BaseModel]] = []
+    for row_number, row in rows:
+        if isinstance(row, str):
+            job.add_error(row_number, row)
+            continue
+        try:
+            valid.append((row_number, schema(**row)))
+        except ValidationError as e:
+            job.add_error(row_number, str(e))
+        except HTTPException as e:
+            # Some custom types (e.g. Password) raise HTTPException from their validators
+            job.add_error(row_number, e.detail)
+
+    if not valid:
+        return
+
+    hashed = await encryption.password_hasher.hash_many([x.password for _, x in valid])
+    for (_, user), password in zip(valid, hashed):
+        user.password = password
+
+    documents = queries.get_create_query_for_mongo([x.dict() for _, x in valid])
+    if Setup.denormalized_details:
+        await snapshots.add_snapshots(documents, job.user_role, db)
+
+    failed = set()
+    try:
+        await crud.create_n_documents(
+            collection=job.user_role.value,
+            document_data=documents,
+            db=db,
+            multi=True,
+            ordered=False,
+        )
+    except pymongo_errors.BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed.add(error["index"])
+            detail = (
+                "Duplicate key error."
+                if error.get("code") == 11000
+                else error.get("errmsg", "Write error.")
+            )
+            job.add_error(valid[error["index"]][0], detail)
+
+    job.inserted += len(valid) - len(failed)
+
+
+async def run_import(
+    job: ImportJob, rows: list[dict | str], db: AsyncIOMotorDatabase
+) -> None:
+    """
+    Validates, hashes and inserts the rows chunk by chunk, updating the job as it goes.
+    """
+    job.status = "running"
+    numbered = list(enumerate(rows, start=1))
+    try:
+        for start in range(0, len(numbered), IMPORT_CHUNK_SIZE):
+            chunk = numbered[start : start + IMPORT_CHUNK_SIZE]
+            await insert_chunk(job, chunk, db)
+            job.processed += len(chunk)
+            # Validation runs on the event loop, let the other requests in between chunks
+            await asyncio.sleep(0)
+        job.status = "done"
+    except HTTPException as e:
+        job.status, job.detail = "failed", e.detail
+    except pymongo_errors.PyMongoError:
+        job.status, job.detail = "failed", "A database error occurred."
+    finally:
+        if job.inserted:
+            await cache.result_cache.invalidate(db, job.user_role.value)
+
+
+import_jobs = ImportJobs()
@@ -0,0 +1,213 @@
+from abc import ABC, abstractmethod
+from crud import crud
+from schemas import schemas
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from datetime import datetime
+from utils.setup import Setup
+import asyncio
+
+
+def to_day(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def to_month(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class Rollup(ABC):
+    """
+    Counters of a collection kept in another one. Every source document adds its
+    counters to one or more rollup documents, removing it subtracts them, so writes
+    update the rollups with $inc instead of recomputing them.
+    """
+
+    source: str
+    target: str
+    # Fields of the source documents needed to compute the counters
+    fields: tuple[str, ...]
+
+    @abstractmethod
+    def counters(self, document: dict) -> list[tuple[dict, dict]]:
+        """
+        The (rollup key, counters) pairs a source document contributes to.
+        """
+
+
+class ScoreRollup(Rollup):
+    """
+    Sums, counts and distributions of the scores per student and per teacher per day.
+    """
+
+    source = schemas.Data.SCORE.value
+    target = Setup.score_rollups
+    fields = ("classes", "breaks", "date", "students_id", "teachers_id")
+
+    def counters(self, document: dict) -> list[tuple[dict, dict]]:
+        values = {
+            "count": 1,
+            "classes_sum": document["classes"],
+            "breaks_sum": document["breaks"],
+            f"classes_dist.{document['classes']}": 1,
+            f"breaks_dist.{document['breaks']}": 1,
+        }
+        day = to_day(document["date"])
+        return [
+            ({"scope": scope, "ref_id": str(ref_id), "day": day}, values)
+            for scope in ("students", "teachers")
+            for ref_id in as_list(document.get(f"{scope}_id"))
+        ]
+
+
+class AttendanceSummary(Rollup):
+    """
+    Registers and present students and teachers per class per day and per month.
+    """
+
+    source = schemas.Data.ATTENDANCE.value
+    target = Setup.attendance_summaries
+    fields = ("classes_id", "date", "students_id", "teachers_id")
+
+    def counters(self, document: dict) -> list[tuple[dict, dict]]:
+        values = {
+            "registers": 1,
+            "students_present": len(as_list(document.get("students_id"))),
+            "teachers_present": len(as_list(document.get("teachers_id"))),
+        }
+        classes_id = str(document["classes_id"])
+        periods = {"day": to_day(document["date"]), "month": to_month(document["date"])}
+        return [
+            ({"classes_id": classes_id, "period": period, "date": date}, values)
+            for period, date in periods.items()
+        ]
+
+
+rollups: dict[str, list[Rollup]] = {
+    schemas.Data.SCORE.value: [ScoreRollup()],
+    schemas.Data.ATTENDANCE.value: [AttendanceSummary()],
+}
+
+
+def is_tracked(collection: str) -> bool:
+    return collection in rollups
+
+
+def get_projection(collection: str) -> dict:
+    return {field: 1 for rollup in rollups[collection] for field in rollup.fields}
+
+
+async def capture(
+    collection: str, search_query: dict, db: AsyncIOMotorDatabase
+) -> list[dict]:
+    """
+    Reads the documents a write is about to change, call sync with them once it's done.
+    """
+    if not is_tracked(collection):
+        return []
+    return await crud.find_n_documents(
+        collection=collection,
+        search_query=search_query,
+        projection=get_projection(collection),
+        db=db,
+    )
+
+
+def get_updates(rollup: Rollup, before: list[dict], after: list[dict]) -> list:
+    totals: dict[tuple, tuple[dict, dict]] = {}
+    for sign, documents in ((-1, before), (1, after)):
+        for document in documents:
+            for key, values in rollup.counters(document):
+                _, counters = totals.setdefault(tuple(key.items()), (key, {}))
+                for field, value in values.items():
+                    counters[field] = counters.get(field, 0) + sign * value
+
+    # Documents that didn't change cancel out
+    return [
+        UpdateOne(key, {"$inc": counters}, upsert=True)
+        for key, counters in totals.values()
+        if any(counters.values())
+    ]
+
+
+async def sync(
+    collection: str,
+    db: AsyncIOMotorDatabase,
+    before: list[dict],
+    ids: list = (),
+) -> None:
+    """
+    Moves the rollups from the captured documents to their current state.
+    `ids` are the inserted documents, the captured ones are read again by their _id.
+    """
+    if not is_tracked(collection):
+        return
+
+    ids = [*ids, *(x["_id"] for x in before)]
+    after = (
+        await crud.find_n_documents(
+            collection=collection,
+            search_query={"_id": {"$in": ids}},
+            projection=get_projection(collection),
+            db=db,
+        )
+        if ids
+        else []
+    )
+
+    for rollup in rollups[collection]:
+        operations = get_updates(rollup, before, after)
+        if operations:
+            await crud.bulk_write_documents(rollup.target, operations, db)
+
+
+async def rebuild_rollups(db: AsyncIOMotorDatabase) -> dict[str, int]:
+    """
+    Recomputes every rollup from its source collection, needed once for existing data
+    or to repair counters after concurrent writes to the same documents.
+    """
+    written = {}
+    for collection in rollups:
+        for rollup in rollups[collection]:
+            await db[rollup.target].delete_many({})
+
+        cursor = db[collection].find({}, get_projection(collection))
+        while batch := await cursor.to_list(length=Setup.stream_batch_size):
+            for rollup in rollups[collection]:
+                operations = get_updates(rollup, [], batch)
+                if operations:
+                    await crud.bulk_write_documents(rollup.target, operations, db)
+
+        for rollup in rollups[collection]:
+            written[rollup.target] = await crud.count_n_documents(
+                collection=rollup.target, search_query={}, db=db
+            )
+
+    return written
+
+
+if __name__ == "__main__":
+    from db.db_handler import MongoClientRegistry, get_db_settings
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Recompute the rollup collections from their sources."
+    )
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    args = parser.parse_args()
+
+    async def main():
+        db_name, mongo_url = get_db_settings(test=args.test)
+        registry = MongoClientRegistry()
+        try:
+            return await rebuild_rollups(registry.get_client(mongo_url)[db_name])
+        finally:
+            registry.close()
+
+    print(asyncio.run(main()))
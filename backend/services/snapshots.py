@@ -0,0 +1,198 @@
+from crud import crud, queries
+from schemas import schemas
+from services import cache
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from bson import ObjectId
+from functools import lru_cache
+from utils.setup import Setup
+import asyncio
+
+
+def details_field(field: str) -> str:
+    return f"{field[:-3]}_details"
+
+
+def as_id_list(value) -> list:
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def to_snapshot(document: dict) -> dict:
+    return {
+        f"{Setup.id}": str(document["_id"]),
+        **{field: document.get(field) for field in Setup.snapshot_fields},
+    }
+
+
+@lru_cache
+def get_referencing_fields(collection: str) -> list[tuple[str, str]]:
+    """
+    The (collection, field) pairs whose *_id field references documents of the given collection.
+    """
+    return [
+        (key_to_schema_map.value, field)
+        for key_to_schema_map in schemas.complete_schema_mapping
+        for field in queries.pipeline_templates.get_reference_fields(key_to_schema_map)
+        if field[:-3] == collection
+    ]
+
+
+async def add_snapshots(
+    documents: list[dict], key_to_schema_map: str, db: AsyncIOMotorDatabase
+) -> None:
+    """
+    Adds the *_details snapshots of the referenced documents to documents about to be written.
+    Referenced documents are read with one query per collection.
+    """
+    fields = [
+        field
+        for field in queries.pipeline_templates.get_reference_fields(key_to_schema_map)
+        if any(field in document for document in documents)
+    ]
+
+    ids_by_collection: dict[str, set[ObjectId]] = {}
+    for field in fields:
+        for document in documents:
+            ids_by_collection.setdefault(field[:-3], set()).update(
+                as_id_list(document.get(field))
+            )
+
+    snapshots = {}
+    for collection, ids in ids_by_collection.items():
+        referenced = await crud.find_n_documents(
+            collection=collection,
+            search_query={"_id": {"$in": list(ids)}},
+            projection={field: 1 for field in Setup.snapshot_fields},
+            db=db,
+        )
+        snapshots[collection] = {x["_id"]: to_snapshot(x) for x in referenced}
+
+    for document in documents:
+        for field in fields:
+            if field not in document:
+                continue
+            details = [
+                snapshots[field[:-3]][x]
+                for x in as_id_list(document[field])
+                if x in snapshots[field[:-3]]
+            ]
+            # Same order as the joined details
+            document[details_field(field)] = sorted(
+                details, key=lambda x: x.get("surname") or ""
+            )
+
+
+async def refresh_snapshots(
+    collection: str, search_query: dict, db: AsyncIOMotorDatabase
+) -> None:
+    """
+    Copies the current snapshot of the documents matching the search query into every document referencing them.
+    """
+    references = get_referencing_fields(collection)
+    if not references:
+        return
+
+    referenced = await crud.find_n_documents(
+        collection=collection,
+        search_query=search_query,
+        projection={field: 1 for field in Setup.snapshot_fields},
+        db=db,
+    )
+
+    for snapshot in map(to_snapshot, referenced):
+        for referencing_collection, field in references:
+            details = details_field(field)
+            result = await crud.update_n_documents(
+                collection=referencing_collection,
+                search_query={f"{details}.{Setup.id}": snapshot[f"{Setup.id}"]},
+                update_query={
+                    "$set": {
+                        f"{details}.$[item].{x}": snapshot[x]
+                        for x in Setup.snapshot_fields
+                    }
+                },
+                array_filters=[{f"item.{Setup.id}": snapshot[f"{Setup.id}"]}],
+                multi=True,
+                db=db,
+            )
+            if result.modified_count:
+                await cache.result_cache.invalidate(db, referencing_collection)
+
+
+async def remove_snapshots(
+    collection: str, ids: list[str], db: AsyncIOMotorDatabase
+) -> None:
+    """
+    Removes the snapshots of deleted documents from every document referencing them.
+    """
+    for referencing_collection, field in get_referencing_fields(collection):
+        details = details_field(field)
+        result = await crud.update_n_documents(
+            collection=referencing_collection,
+            search_query={f"{details}.{Setup.id}": {"$in": ids}},
+            update_query={"$pull": {details: {f"{Setup.id}": {"$in": ids}}}},
+            multi=True,
+            db=db,
+        )
+        if result.modified_count:
+            await cache.result_cache.invalidate(db, referencing_collection)
+
+
+async def backfill_snapshots(db: AsyncIOMotorDatabase) -> dict[str, int]:
+    """
+    Writes the snapshots of every existing document, needed once when turning on denormalized details.
+    """
+    updated = {}
+    for key_to_schema_map in schemas.complete_schema_mapping:
+        fields = queries.pipeline_templates.get_reference_fields(key_to_schema_map)
+        if not fields:
+            continue
+
+        collection = key_to_schema_map.value
+        cursor = db[collection].find({}, {field: 1 for field in fields})
+        updated[collection] = 0
+        while batch := await cursor.to_list(length=Setup.stream_batch_size):
+            await add_snapshots(batch, key_to_schema_map, db)
+            operations = [
+                UpdateOne(
+                    {"_id": document["_id"]},
+                    {
+                        "$set": {
+                            details_field(x): document[details_field(x)]
+                            for x in fields
+                            if x in document
+                        },
+                        "$inc": {Setup.version: 1},
+                    },
+                )
+                for document in batch
+            ]
+            result = await crud.bulk_write_documents(collection, operations, db)
+            updated[collection] += result.modified_count
+
+        await cache.result_cache.invalidate(db, collection)
+
+    return updated
+
+
+if __name__ == "__main__":
+    from db.db_handler import MongoClientRegistry, get_db_settings
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Write the *_details snapshots of every existing document."
+    )
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    args = parser.parse_args()
+
+    async def main():
+        db_name, mongo_url = get_db_settings(test=args.test)
+        registry = MongoClientRegistry()
+        try:
+            return await backfill_snapshots(registry.get_client(mongo_url)[db_name])
+        finally:
+            registry.close()
+
+    print(asyncio.run(main()))
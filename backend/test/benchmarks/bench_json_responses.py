@@ -0,0 +1,70 @@
+"""
+CPU cost of rendering a list of scores with the default FastAPI path (jsonable_encoder + JSONResponse)
+against FastJSONResponse. Run from the backend folder: python -m test.benchmarks.bench_json_responses
+"""
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from utils.responses import FastJSONResponse
+from datetime import datetime, timedelta
+from bson import ObjectId
+import argparse
+import json
+import time
+
+
+def make_scores(count: int) -> dict:
+    """A read_n_scores response with joined student details, as returned by the services."""
+    start = datetime(2023, 9, 1, 8, 30)
+    results = [
+        {
+            "id": str(ObjectId()),
+            "classes": index % 10 + 1,
+            "breaks": (index * 7) % 10 + 1,
+            "date": start + timedelta(hours=index),
+            "details": ["Participates", "Homework done"],
+            "teachers_id": str(ObjectId()),
+            "creation": start,
+            "students_details": [
+                {"id": str(ObjectId()), "name": "Name", "surname": "Surname"}
+            ],
+        }
+        for index in range(count)
+    ]
+    return {"results": results, "count": count, "next": None}
+
+
+def cpu_time_per_request(render, content: dict, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        render(content)
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    def render_default(content: dict) -> bytes:
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def render_fast(content: dict) -> bytes:
+        return FastJSONResponse(content).body
+
+    # Both paths must produce the same document
+    sample = make_scores(10)
+    assert json.loads(render_default(sample)) == json.loads(render_fast(sample))
+
+    print(f"{'scores':>8} {'default ms':>12} {'fast ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        content = make_scores(size)
+        default, fast = [
+            cpu_time_per_request(render, content, args.repeat) * 1000
+            for render in (render_default, render_fast)
+        ]
+        print(f"{size:>8} {default:>12.2f} {fast:>10.2f} {default / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
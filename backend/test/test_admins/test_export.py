@@ -0,0 +1,73 @@
+from schemas import schemas, custom_types
+import unittest
+import aiohttp
+import gzip
+import json
+from test.test_main import SharedTestData
+
+
+class TestAdminsExport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """Prepare some static data"""
+        self.headers = {
+            "X-Test-Env": "true",
+            "Authorization": "Bearer ",
+        }
+        self.url = "http://backend:80/admins/export"
+
+    async def export(
+        self,
+        token: str = "",
+        collection: str = schemas.User.TEACHER.value,
+        params: dict = None,
+        debug: bool = False,
+    ):
+        self.headers["Authorization"] = f"Bearer {token}"
+
+        async with aiohttp.ClientSession(auto_decompress=False) as session:
+            response = await session.get(
+                f"{self.url}/{collection}", headers=self.headers, params=params or {}
+            )
+            if debug:
+                SharedTestData.debug_print(token, collection, params, response.status)
+            return response.status, await response.read()
+
+    async def test_fail_export(self):
+        """Export - Fail"""
+
+        # Only admins can export
+        for role in custom_types.User:
+            if role != custom_types.User.ADMIN:
+                status, _ = await self.export(token=SharedTestData.tokens[role.value])
+                assert status == 401
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        for collection, params in [
+            ("invalid_collection", {}),
+            (schemas.User.TEACHER.value, {"file_format": "xml"}),
+            (schemas.User.TEACHER.value, {"fields": "password"}),
+            (schemas.User.TEACHER.value, {"query": json.dumps({"invalid_name": "A"})}),
+        ]:
+            status, _ = await self.export(
+                token=token, collection=collection, params=params
+            )
+            assert status == 422
+
+    async def test_pass_export(self):
+        """Export - Pass"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+
+        status, body = await self.export(token=token)
+        assert status == 200
+        users = [json.loads(x) for x in body.decode().splitlines()]
+        assert users and all("password" not in x and "phone" not in x for x in users)
+
+        status, body = await self.export(
+            token=token,
+            params={"file_format": "csv", "fields": "name,email", "gzip": "true"},
+        )
+        assert status == 200
+        lines = gzip.decompress(body).decode().splitlines()
+        assert lines[0] == "id,name,email"
+        assert len(lines) == len(users) + 1
@@ -0,0 +1,97 @@
+from datetime import datetime
+from schemas import schemas, custom_types
+import unittest
+import asyncio
+import aiohttp
+import uuid
+from test.test_main import SharedTestData
+
+
+class TestAdminsImport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """Prepare some static data"""
+        self.headers = {
+            "X-Test-Env": "true",
+            "Authorization": "Bearer ",
+        }
+        self.url = "http://backend:80/admins/import"
+        birthday = datetime.now().isoformat()
+        # Emails are unique per run, the users of previous runs stay in the database
+        first_email, second_email = (f"import_{uuid.uuid4().hex}@test.com" for _ in range(2))
+        self.valid_csv = (
+            "name,surname,birthday,email,password,phone,subjects\n"
+            f"ImportName,ImportSurname,{birthday},{first_email},testPassword1!,+393715485996,Math;Art\n"
+            f"ImportName,ImportSurname,{birthday},{second_email},testPassword1!,+393715485996,Math\n"
+            # Invalid email
+            f"ImportName,ImportSurname,{birthday},not-an-email,testPassword1!,+393715485996,Math\n"
+            # Duplicated email
+            f"ImportName,ImportSurname,{birthday},{first_email},testPassword1!,+393715485996,Math\n"
+        )
+
+    async def upload(
+        self,
+        token: str = "",
+        contents: str = "",
+        user_role: str = schemas.User.TEACHER.value,
+        debug: bool = False,
+    ):
+        self.headers["Authorization"] = f"Bearer {token}"
+        data = aiohttp.FormData()
+        data.add_field("file", contents.encode(), filename="users.csv")
+
+        async with aiohttp.ClientSession() as session:
+            response = await session.post(
+                self.url,
+                headers=self.headers,
+                data=data,
+                params={"user_role": user_role, "file_format": "csv"},
+            )
+            if debug:
+                SharedTestData.debug_print(token, user_role, response.status)
+            return response.status, await response.json()
+
+    async def read_progress(self, token: str, import_id: str):
+        self.headers["Authorization"] = f"Bearer {token}"
+        async with aiohttp.ClientSession() as session:
+            response = await session.get(f"{self.url}/{import_id}", headers=self.headers)
+            return response.status, await response.json()
+
+    async def test_fail_import_users(self):
+        """Import Users - Fail"""
+
+        # Only admins can import users
+        for role in custom_types.User:
+            if role != custom_types.User.ADMIN:
+                token = SharedTestData.tokens[role.value]
+                status, _ = await self.upload(token=token, contents=self.valid_csv)
+                assert status == 401
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+
+        # Admins can't be imported and empty files are refused
+        status, _ = await self.upload(
+            token=token, contents=self.valid_csv, user_role=schemas.User.ADMIN.value
+        )
+        assert status == 422
+        status, _ = await self.upload(token=token, contents="")
+        assert status == 422
+
+        status, _ = await self.read_progress(token=token, import_id="invalid-id")
+        assert status == 404
+
+    async def test_pass_import_users(self):
+        """Import Users - Pass"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        status, data = await self.upload(token=token, contents=self.valid_csv)
+        assert status == 202
+        assert data["total"] == 4
+
+        while data["status"] in ("pending", "running"):
+            await asyncio.sleep(0.5)
+            status, data = await self.read_progress(token=token, import_id=data["id"])
+            assert status == 200
+
+        assert data["status"] == "done"
+        assert data["inserted"] == 2
+        assert [x["row"] for x in data["errors"]] == [3, 4]
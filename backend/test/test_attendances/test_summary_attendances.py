@@ -0,0 +1,99 @@
+from schemas import schemas, custom_types
+import unittest
+import aiohttp
+from bson import ObjectId
+from test.test_main import SharedTestData
+
+
+class TestAttendancesSummary(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """Prepare some static data"""
+        self.headers = {
+            "X-Test-Env": "true",
+            "Content-Type": "application/json",
+            "Authorization": "Bearer ",
+        }
+        self.url = "http://backend:80/attendances/"
+        # A class of its own, so the summaries only count the registers of this test
+        self.classes_id = str(ObjectId())
+        self.valid_attendance_data = {
+            "classes_id": self.classes_id,
+            "teachers_id": [str(ObjectId())],
+            "students_id": [str(ObjectId()), str(ObjectId())],
+            "date": "2023-11-27T12:31:14",
+        }
+        self.search_query = SharedTestData.encode_queries({"classes_id": self.classes_id})
+
+    async def summary(self, token: str = "", period: str = "day", debug: bool = False):
+        self.headers["Authorization"] = f"Bearer {token}"
+        params = {"classes_id": self.classes_id, "period": period}
+
+        async with aiohttp.ClientSession() as session:
+            response = await session.get(
+                f"{self.url}summary", headers=self.headers, params=params
+            )
+            if debug:
+                SharedTestData.debug_print(token, params, response.status)
+            return response.status, await response.json()
+
+    async def students_present(self, token: str) -> dict:
+        """Present students of the class per period"""
+        figures = {}
+        for period in ("day", "month"):
+            status, data = await self.summary(token=token, period=period)
+            assert status == 200
+            figures[period] = [(x["date"], x["students_present"]) for x in data["results"]]
+        return figures
+
+    async def test_pass_summary_attendances(self):
+        """Attendances Summary - Pass"""
+
+        token = SharedTestData.tokens[custom_types.User.TEACHER.value]
+        self.headers["Authorization"] = f"Bearer {token}"
+
+        # Create
+        async with aiohttp.ClientSession() as session:
+            response = await session.post(
+                self.url, headers=self.headers, json=self.valid_attendance_data
+            )
+            assert response.status == 200
+
+        assert await self.students_present(token) == {
+            "day": [("2023-11-27T00:00:00", 2)],
+            "month": [("2023-11-01T00:00:00", 2)],
+        }
+
+        # Update, the counters move with the register
+        students_id = [str(ObjectId()) for _ in range(3)]
+        async with aiohttp.ClientSession() as session:
+            response = await session.patch(
+                self.url,
+                headers=self.headers,
+                params=f"query={self.search_query}",
+                json={"students_id": students_id},
+            )
+            assert response.status == 200
+
+        assert await self.students_present(token) == {
+            "day": [("2023-11-27T00:00:00", 3)],
+            "month": [("2023-11-01T00:00:00", 3)],
+        }
+
+        # Delete, periods without registers aren't returned
+        async with aiohttp.ClientSession() as session:
+            response = await session.delete(
+                self.url, headers=self.headers, params=f"query={self.search_query}"
+            )
+            assert response.status == 200
+
+        assert await self.students_present(token) == {"day": [], "month": []}
+
+    async def test_fail_summary_attendances(self):
+        """Attendances Summary - Fail"""
+
+        status, _ = await self.summary(token="Invalid Token")
+        assert status == 401
+
+        token = SharedTestData.tokens[custom_types.User.TEACHER.value]
+        status, _ = await self.summary(token=token, period="year")
+        assert status == 422
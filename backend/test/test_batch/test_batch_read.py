@@ -0,0 +1,68 @@
+from schemas import schemas, custom_types
+import unittest
+import aiohttp
+from test.test_main import SharedTestData
+
+
+class TestBatchRead(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """Prepare some static data"""
+        self.headers = {
+            "X-Test-Env": "true",
+            "Content-Type": "application/json",
+            "Authorization": "Bearer ",
+        }
+        self.url = "http://backend:80/batch/read"
+
+    async def read(self, token: str = "", items: list = None, debug: bool = False):
+        """Batch Read Endpoint"""
+        self.headers["Authorization"] = f"Bearer {token}"
+
+        async with aiohttp.ClientSession() as session:
+            response = await session.post(self.url, headers=self.headers, json=items)
+            if debug:
+                SharedTestData.debug_print(token, items, response.status)
+            return response.status, await response.json()
+
+    async def test_fail_batch_read(self):
+        """Batch Read - Fail"""
+
+        # Only logged users can read otherwise the api should return 401
+        status, _ = await self.read(token="Invalid Token", items=[])
+        assert status == 401
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        invalid_items = [
+            # Neither ids nor query
+            [{"collection": schemas.Data.CLASS.value}],
+            # Both ids and query
+            [{"collection": schemas.Data.CLASS.value, "ids": [], "query": {}}],
+            # Unknown collection
+            [{"collection": "invalid_collection", "ids": []}],
+            # Invalid id
+            [{"collection": schemas.Data.CLASS.value, "ids": ["invalid-id"]}],
+            # Query not matching the schema
+            [{"collection": schemas.Data.CLASS.value, "query": {"invalid_name": "A"}}],
+        ]
+        for items in invalid_items:
+            status, _ = await self.read(token=token, items=items)
+            assert status == 422
+
+    async def test_pass_batch_read(self):
+        """Batch Read - Pass"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        users_ids = list(SharedTestData.user_role_id.items())
+        items = [
+            {"key": role.value, "collection": role.value, "ids": [user_id]}
+            for role, user_id in users_ids
+        ]
+        items.append({"collection": schemas.Data.CLASS.value, "query": {"name": "A"}})
+
+        status, data = await self.read(token=token, items=items)
+        assert status == 200
+
+        for role, user_id in users_ids:
+            assert [x["id"] for x in data["results"][role.value]] == [user_id]
+            assert "password" not in data["results"][role.value][0]
+        assert str(len(items) - 1) in data["results"]
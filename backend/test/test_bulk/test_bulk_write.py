@@ -0,0 +1,101 @@
+from datetime import datetime
+from schemas import schemas, custom_types
+import unittest
+import aiohttp
+from test.test_main import SharedTestData
+
+
+class TestBulkWrite(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """Prepare some static data"""
+        self.headers = {
+            "X-Test-Env": "true",
+            "Content-Type": "application/json",
+            "Authorization": "Bearer ",
+        }
+        self.url = "http://backend:80/bulk"
+        self.valid_class_data = {
+            "name": "Bulk",
+            "grade": 1,
+            "teachers_id": [],
+            "students_id": [],
+            "creation": datetime.now().isoformat(),
+        }
+
+    async def write(self, token: str = "", operations: list = None, debug: bool = False):
+        """Bulk Write Endpoint"""
+        self.headers["Authorization"] = f"Bearer {token}"
+
+        async with aiohttp.ClientSession() as session:
+            response = await session.post(self.url, headers=self.headers, json=operations)
+            if debug:
+                SharedTestData.debug_print(token, operations, response.status)
+            return response.status, await response.json()
+
+    async def test_fail_bulk_write(self):
+        """Bulk Write - Fail"""
+
+        # Only admins and teachers can write otherwise the api should return 401
+        status, _ = await self.write(token="Invalid Token", operations=[])
+        assert status == 401
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        invalid_operations = [
+            # Unknown operation
+            [{"operation": "upsert", "collection": schemas.Data.CLASS.value}],
+            # Insert without a document
+            [{"operation": "insert", "collection": schemas.Data.CLASS.value}],
+            # Update without the update
+            [{"operation": "update", "collection": schemas.Data.CLASS.value, "query": {}}],
+        ]
+        for operations in invalid_operations:
+            status, _ = await self.write(token=token, operations=operations)
+            assert status == 422
+
+    async def test_pass_bulk_write(self):
+        """Bulk Write - Pass"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        operations = [
+            {
+                "operation": "insert",
+                "collection": schemas.Data.CLASS.value,
+                "document": self.valid_class_data,
+            },
+            # Invalid documents fail alone without stopping the others
+            {
+                "operation": "insert",
+                "collection": schemas.Data.CLASS.value,
+                "document": {**self.valid_class_data, "invalid_name": "A"},
+            },
+            {
+                "operation": "update",
+                "collection": schemas.Data.CLASS.value,
+                "query": {"name": "Bulk"},
+                "update": {"name": "Updated"},
+            },
+            # Admins can't write scores
+            {
+                "operation": "delete",
+                "collection": schemas.Data.SCORE.value,
+                "query": {"classes": 6},
+            },
+        ]
+
+        status, data = await self.write(token=token, operations=operations)
+        assert status == 200
+        assert [x["status"] for x in data["results"]] == ["ok", "error", "ok", "error"]
+        assert "id" in data["results"][0]
+
+        status, data = await self.write(
+            token=token,
+            operations=[
+                {
+                    "operation": "delete",
+                    "collection": schemas.Data.CLASS.value,
+                    "query": {"name": "Updated"},
+                }
+            ],
+        )
+        assert status == 200
+        assert data["counts"][schemas.Data.CLASS.value]["deleted"] == 1
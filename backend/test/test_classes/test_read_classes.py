@@ -41,11 +41,13 @@ class TestClassesRead(unittest.IsolatedAsyncioTestCase):
         token: str = "",
         search_query: dict = None,
         multi: bool = False,
+        extra_params: str = "",
         debug: bool = False,
     ):
         """Read Endpoint"""
         query = search_query if search_query else self.valid_query
         params = f"query={SharedTestData.encode_queries(query)}&multi={multi}"
+        params += extra_params
 
         self.headers["Authorization"] = f"Bearer {token}"
         async with aiohttp.ClientSession() as session:
@@ -98,3 +100,99 @@ class TestClassesRead(unittest.IsolatedAsyncioTestCase):
             debug=False,
         )
         assert status == 404
+
+    async def test_pass_paginate_classes(self):
+        """Read Classes - Pagination"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        status, first_page = await self.read(
+            token=token,
+            multi=True,
+            extra_params="&limit=1",
+        )
+        assert status == 200
+        assert first_page["count"] == 1
+        assert "next" in first_page
+
+        if first_page["next"]:
+            status, second_page = await self.read(
+                token=token,
+                multi=True,
+                extra_params=f"&limit=1&after={first_page['next']}",
+            )
+            assert status in (200, 404)
+            if status == 200:
+                assert (
+                    second_page["results"][0]["id"] != first_page["results"][0]["id"]
+                )
+
+        # A malformed cursor should return 422
+        status, _ = await self.read(
+            token=token,
+            multi=True,
+            extra_params="&limit=1&after=not-a-cursor",
+        )
+        assert status == 422
+
+    async def test_pass_sort_classes(self):
+        """Read Classes - Sort"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+
+        # Only scalar schema fields can be sorted on
+        for invalid_sort in ["invalid_name", "students_id", "details", "name,-name"]:
+            status, _ = await self.read(
+                token=token, multi=True, extra_params=f"&sort={invalid_sort}"
+            )
+            assert status == 422
+
+        # Walk the pages one document at a time, the order must hold across pages
+        grades, cursor = [], ""
+        while True:
+            status, page = await self.read(
+                token=token, multi=True, extra_params=f"&sort=-grade&limit=1{cursor}"
+            )
+            assert status == 200
+            grades += [x["grade"] for x in page["results"]]
+            if not page["next"]:
+                break
+            cursor = f"&after={page['next']}"
+        assert grades == sorted(grades, reverse=True)
+
+        # A cursor can't be reused with another sort
+        if cursor:
+            status, _ = await self.read(
+                token=token, multi=True, extra_params=f"&sort=grade&limit=1{cursor}"
+            )
+            assert status == 422
+
+    async def test_pass_count_classes(self):
+        """Read Classes - Count Only"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        status, classes_data = await self.read(token=token, multi=True)
+        assert status == 200
+
+        status, count_data = await self.read(
+            token=token, extra_params="&count_only=True"
+        )
+        assert status == 200
+        assert count_data == {"count": classes_data["count"]}
+
+    async def test_pass_conditional_read_classes(self):
+        """Read Classes - ETag"""
+
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        params = f"query={SharedTestData.encode_queries(self.valid_query)}&multi=True"
+        self.headers["Authorization"] = f"Bearer {token}"
+
+        async with aiohttp.ClientSession() as session:
+            response = await session.get(self.url, headers=self.headers, params=params)
+            assert response.status == 200
+            etag = response.headers.get("ETag")
+            assert etag is not None
+
+            # Unchanged data should not be sent again
+            headers = {**self.headers, "If-None-Match": etag}
+            response = await session.get(self.url, headers=headers, params=params)
+            assert response.status == 304
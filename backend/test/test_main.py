@@ -4,6 +4,7 @@ from decouple import config
 import motor.motor_asyncio
 import tracemalloc
 from schemas import schemas, custom_types
+from db import index_manager
 import json
 import urllib.parse
 
@@ -65,6 +66,8 @@ def run_test_suite(test_suite):
 if __name__ == "__main__":
     # Preliminary deletion of previous tests data
     asyncio.run(clean_db_before_tests())
+    # The app only indexes the database it serves, unique emails etc. are needed in the tests too
+    asyncio.run(index_manager.main(test=True))
 
     # ------- Tests Configuration -------
 
@@ -109,6 +112,16 @@ if __name__ == "__main__":
         scores_delete,
     )
 
+    # ATTENDANCES - SUMMARY
+    attendances_summary = (
+        "test.test_attendances.test_summary_attendances.TestAttendancesSummary"
+    )
+
+    attendances_suite = create_test_suite(
+        user_create,
+        attendances_summary,
+    )
+
     # ADMINS - UD
     admins_update = "test.test_admins.test_update_admins.TestAdminsUpdate"
     admins_delete = "test.test_admins.test_delete_admins.TestAdminsDelete"
@@ -123,4 +136,5 @@ if __name__ == "__main__":
     # run_test_suite(users_crud_suite)
     # run_test_suite(classes_crud_suite)
     # run_test_suite(scores_crud_suite)
+    # run_test_suite(attendances_suite)
     run_test_suite(admins_crud_suite)
@@ -4,6 +4,7 @@ import unittest
 import aiohttp
 from datetime import datetime
 from test.test_main import SharedTestData
+import json
 
 
 class TestScoresRead(unittest.IsolatedAsyncioTestCase):
@@ -98,3 +99,101 @@ class TestScoresRead(unittest.IsolatedAsyncioTestCase):
             debug=False,
         )
         assert status == 404
+
+    async def test_pass_stream_scores(self):
+        """Read Scores - Stream"""
+
+        token = SharedTestData.tokens[custom_types.User.TEACHER.value]
+        params = (
+            f"query={SharedTestData.encode_queries(self.valid_query)}"
+            f"&multi=True&stream=True"
+        )
+        self.headers["Authorization"] = f"Bearer {token}"
+
+        async with aiohttp.ClientSession() as session:
+            response = await session.get(self.url, headers=self.headers, params=params)
+            assert response.status == 200
+            assert response.headers["Content-Type"].startswith("application/x-ndjson")
+
+            async for line in response.content:
+                score_data = json.loads(line)
+                data_obj = schemas.ThingsFactory.create_thing(
+                    thing=schemas.Data.SCORE.value,
+                    data=score_data,
+                )
+                assert data_obj != None
+
+    async def test_pass_scores_analytics(self):
+        """Read Scores - Analytics"""
+
+        token = SharedTestData.tokens[custom_types.User.TEACHER.value]
+        self.headers["Authorization"] = f"Bearer {token}"
+        url = f"{self.url}analytics"
+        student_id = SharedTestData.user_role_id[custom_types.User.STUDENT.value]
+        score_data = {
+            "classes": 6,
+            "breaks": 8,
+            "date": datetime.now().isoformat(),
+            "details": [],
+            "students_id": student_id,
+            "creation": datetime.now().isoformat(),
+        }
+
+        async with aiohttp.ClientSession() as session:
+            response = await session.get(
+                url, headers=self.headers, params={"scope": "invalid_scope"}
+            )
+            assert response.status == 422
+
+            # The rollup of the student holds at least the score created here
+            response = await session.post(
+                self.url, headers=self.headers, json=score_data
+            )
+            assert response.status == 200
+
+            response = await session.get(
+                url,
+                headers=self.headers,
+                params={"scope": "students", "ids": student_id},
+            )
+            assert response.status == 200
+            data = await response.json()
+
+        assert [x["id"] for x in data["results"]] == [student_id]
+        student = data["results"][0]
+        assert student["count"] >= 1
+        assert sum(student["classes"]["distribution"].values()) == student["count"]
+        assert 1 <= student["classes"]["average"] <= 10
+
+    async def test_range_read_scores(self):
+        """Read Scores - Ranges"""
+
+        token = SharedTestData.tokens[custom_types.User.TEACHER.value]
+        invalid_ranges = [
+            # Bounds must match the field type
+            {"classes": {"$gte": "high"}},
+            {"classes": {"$lte": 11}},
+            # Ids and lists can't be compared
+            {"students_id": {"$gt": "a"}},
+            {"details": {"$gt": ["a"]}},
+            # $between takes exactly two bounds
+            {"date": {"$between": ["2023-11-01T00:00:00"]}},
+            {"classes": {"$between": [1, 5], "$lt": 3}},
+        ]
+        for invalid_range in invalid_ranges:
+            status, _ = await self.read(token=token, search_query=invalid_range)
+            assert status == 422
+
+        status, score_data = await self.read(
+            token=token,
+            search_query={
+                "classes": {"$between": [5, 7]},
+                "breaks": {"$gte": 8},
+                "date": {"$gte": "2023-11-01T00:00:00", "$lt": "2023-12-01T00:00:00"},
+            },
+            multi=True,
+        )
+        assert status == 200
+        for score in score_data["results"]:
+            assert 5 <= score["classes"] <= 7 and score["breaks"] >= 8
+            assert score["date"].startswith("2023-11")
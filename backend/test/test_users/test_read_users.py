@@ -12,13 +12,13 @@ class TestUserRead(unittest.IsolatedAsyncioTestCase):
         self.headers = {"X-Test-Env": "true", "Content-Type": "application/json"}
         self.url = "http://backend:80/users/"
 
-    async def read(self, token: str = None, debug: bool = False):
+    async def read(self, token: str = None, params: dict = None, debug: bool = False):
         "A not valid input user_role should return 422"
         if token:
             self.headers.update({"Authorization": f"Bearer {token}"})
 
         async with aiohttp.ClientSession() as session:
-            response = await session.get(self.url, headers=self.headers)
+            response = await session.get(self.url, headers=self.headers, params=params)
             if debug:
                 SharedTestData.debug_print(token, response.status)
             return response.status, await response.json()
@@ -43,3 +43,64 @@ class TestUserRead(unittest.IsolatedAsyncioTestCase):
 
             assert user_obj != None
             assert status == 200
+
+            # The trusted output has the same shape as the validated model
+            assert set(user_data) == set(user_obj.dict())
+            assert "password" not in user_data and "phone" not in user_data
+
+    async def test_pass_read_user_fields(self):
+        """Read User - Sparse fieldsets"""
+        for role in custom_types.User:
+            token = SharedTestData.tokens[role.value]
+
+            status, user_data = await self.read(
+                token=token, params={"fields": "name,surname"}
+            )
+            assert status == 200
+            assert set(user_data.keys()) == {"id", "name", "surname"}
+
+            # Unknown or sensitive fields should return 422
+            for fields in ["invalid_field", "password"]:
+                status, _ = await self.read(token=token, params={"fields": fields})
+                assert status == 422
+
+    async def test_fail_search_user_ranges(self):
+        """Search Users - Ranges on sensitive fields"""
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        self.headers.update({"Authorization": f"Bearer {token}"})
+
+        for role in custom_types.User:
+            for query in [
+                {"password": {"$gt": "$2b$12$"}},
+                {"phone": {"$gte": "+39"}},
+                {"password": {"$between": ["$2a", "$2c"]}},
+            ]:
+                params = {
+                    "role": role.value,
+                    "search_query": SharedTestData.encode_queries(query),
+                    "multi": "True",
+                }
+                async with aiohttp.ClientSession() as session:
+                    response = await session.get(
+                        f"{self.url}search", headers=self.headers, params=params
+                    )
+                    assert response.status == 422
+
+    async def test_fail_search_user_sort(self):
+        """Search Users - Sort on optional fields"""
+        token = SharedTestData.tokens[custom_types.User.ADMIN.value]
+        self.headers.update({"Authorization": f"Bearer {token}"})
+
+        # Documents without a value would be skipped by the pagination cursor
+        for role in custom_types.User:
+            params = {
+                "role": role.value,
+                "search_query": SharedTestData.encode_queries({}),
+                "multi": "True",
+                "sort": "profile_pic",
+            }
+            async with aiohttp.ClientSession() as session:
+                response = await session.get(
+                    f"{self.url}search", headers=self.headers, params=params
+                )
+                assert response.status == 422
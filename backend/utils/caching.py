@@ -0,0 +1,50 @@
+from fastapi import Request, Response
+from utils.setup import Setup
+from utils.responses import FastJSONResponse
+import hashlib
+import json
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks an If-None-Match header against the ETag of the current representation.
+    """
+    if not if_none_match:
+        return False
+    candidates = [x.strip().removeprefix("W/") for x in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def pop_versions(data: list | dict | None) -> list:
+    """
+    Removes the version of the documents and of their joined details, returning them with their ids.
+    """
+    documents = data if isinstance(data, list) else [data] if data else []
+
+    versions = []
+    for document in documents:
+        versions.append((document.get(Setup.id), document.pop(Setup.version, 0)))
+        for key, value in document.items():
+            if key.endswith("_details") and isinstance(value, list):
+                versions.extend(pop_versions(value))
+
+    return versions
+
+
+def build_etag(versions: list, *salt) -> str:
+    """
+    Builds a strong ETag from document versions and whatever else shapes the representation.
+    """
+    digest = hashlib.sha256(json.dumps([versions, salt], default=str).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_response(content: dict, documents: list | dict, request: Request, *salt):
+    """
+    Answers a read with its ETag, or with 304 and no body when the client already has it.
+    """
+    etag = build_etag(pop_versions(documents), request.url.query, *salt)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return FastJSONResponse(content, headers={"ETag": etag})
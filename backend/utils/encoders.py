@@ -0,0 +1,54 @@
+from bson import ObjectId
+from datetime import datetime, date
+from typing import AsyncIterator
+import csv
+import io
+import json
+import zlib
+
+# Separator of the values of list fields inside a CSV cell
+CSV_LIST_SEPARATOR = ";"
+
+
+def default_encoder(value):
+    """
+    Encodes the BSON types found in database documents into JSON friendly values.
+    """
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson_line(document: dict) -> bytes:
+    return (json.dumps(document, default=default_encoder) + "\n").encode()
+
+
+def to_csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(to_csv_cell(x) for x in value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=default_encoder)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def to_csv_line(values: list) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([to_csv_cell(x) for x in values])
+    return buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Compresses a byte stream on the fly into a single gzip member.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
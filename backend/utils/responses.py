@@ -0,0 +1,69 @@
+from fastapi import Response
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from bson import ObjectId
+from functools import wraps
+import asyncio
+import orjson
+
+
+def orjson_default(value):
+    """
+    Encodes what orjson doesn't know natively, datetimes, dates, enums and dicts are handled by orjson itself.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson, straight from the documents returned by the services.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Renders the plain dicts and lists returned by async endpoints with FastJSONResponse,
+    skipping the recursive jsonable_encoder pass FastAPI runs on every return value.
+    Endpoints with a pydantic response_model keep the default validation and filtering.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get("response_model", Default(None))
+        if isinstance(response_model, DefaultPlaceholder):
+            response_model = response_model.value
+
+        # Included routers are copied with their already wrapped endpoint
+        renders_json = getattr(endpoint, "renders_json", False)
+        if (
+            not renders_json
+            and asyncio.iscoroutinefunction(endpoint)
+            and response_model in (None, dict, list)
+        ):
+            endpoint = self.render_with(endpoint, kwargs.get("status_code") or 200)
+
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def render_with(endpoint, status_code: int):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            content = await endpoint(*args, **kwargs)
+            if isinstance(content, Response):
+                return content
+            return FastJSONResponse(content, status_code=status_code)
+
+        wrapper.renders_json = True
+        return wrapper
@@ -1,6 +1,25 @@
+from decouple import config
+
+
 class Setup:
     expiration_days_jwt = 7
     role = "role"
     expiration = "exp"
     id = "id"
+    version = "_version"
+    updated_at = "_updated_at"
     querySchemaKey = "schema"
+    stream_batch_size = 500
+    batch_max_items = 100
+    bulk_max_operations = 1000
+    profile_pic_bucket = "profile_pics"
+    profile_pic_url = "/users/profile-picture/{picture_id}"
+    # Pictures are immutable, every upload gets a new id
+    profile_pic_cache_control = "public, max-age=31536000, immutable"
+    # Store compact *_details snapshots on write instead of joining on read
+    denormalized_details = config("DENORMALIZED_DETAILS", default=False, cast=bool)
+    snapshot_fields = ("name", "surname")
+    score_rollups = "score_rollups"
+    attendance_summaries = "attendance_summaries"
+    # Every Score is an integer in this range, rollups keep one counter per value
+    score_values = range(1, 11)
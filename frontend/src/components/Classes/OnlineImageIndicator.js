@@ -5,7 +5,12 @@ import classes from "./OnlineImageIndicator.module.scss";
 
 const OnlineImageIndicator = (props) => {
   const isOnline = Math.random() < 0.5;
-  const imageSrc = props.profile_pic ? props.profile_pic : placeholder_user;
+  // Uploaded pictures are served by the backend under a relative URL
+  const imageSrc = props.profile_pic
+    ? props.profile_pic.startsWith("/")
+      ? `http://localhost:8000${props.profile_pic}?variant=thumbnail`
+      : props.profile_pic
+    : placeholder_user;
 
   const onlineColorIndicator = { false: "red", true: "green" };
   return (